@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import argparse
-import asyncio
 import sys
 
 
@@ -24,11 +23,21 @@ def main() -> None:
     )
     args = parser.parse_args()
 
+    # Deferred so --help exits before paying for the event loop or the app
+    import asyncio
+
+    # uvloop.run() builds its own loop on every Python version (via
+    # loop_factory on 3.12+), avoiding the deprecated loop-policy API
+    try:
+        from uvloop import run
+    except ImportError:
+        run = asyncio.run
+
     from jace.app import Application
 
     app = Application(config_path=args.config)
     try:
-        asyncio.run(app.start(api=args.api))
+        run(app.start(api=args.api))
     except KeyboardInterrupt:
         pass
 
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import logging
 from dataclasses import dataclass, field
 from typing import Awaitable, Callable
@@ -12,15 +13,27 @@ from jace.agent.anomaly import AnomalyResult
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class AnomalyEntry:
-    """Single category's anomaly data within a batch."""
+    """Single category's anomaly data within a batch.
+
+    ``block`` is the entry's prompt section, rendered once at construction.
+    """
     category: str
     anomalies: list[AnomalyResult]
     raw_data: str
+    block: str = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        anomaly_text = "\n".join(a.to_context_line() for a in self.anomalies)
+        self.block = (
+            f"=== {self.category} ===\n"
+            f"Detected anomalies:\n{anomaly_text}\n\n"
+            f"Raw command output:\n{self.raw_data}\n"
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class AnomalyBatch:
     """All anomaly entries for a single device collected over a window."""
     device: str
@@ -38,16 +51,32 @@ BatchCallback = Callable[[AnomalyBatch], Awaitable[None]]
 class AnomalyAccumulator:
     """Batches anomalies per device over a sliding time window.
 
-    Each ``submit()`` for a device restarts the window timer, so a burst
+    Each ``submit()`` for a device pushes its flush deadline back, so a burst
     of categories firing within ``window_seconds`` of each other all land
-    in the same batch.
+    in the same batch.  Deadlines live in a heap drained by a single
+    ``loop.call_at`` timer handle armed for the earliest deadline;
+    superseded heap entries are skipped lazily instead of cancelling and
+    recreating a timer per submit.
+
+    A device that keeps firing would otherwise extend its window forever, so
+    a batch reaching *max_batch_entries* is flushed immediately, and each
+    entry's raw output is capped at *max_raw_chars*.
     """
 
-    def __init__(self, window_seconds: float = 30.0) -> None:
+    def __init__(
+        self,
+        window_seconds: float = 30.0,
+        max_batch_entries: int = 50,
+        max_raw_chars: int = 50_000,
+    ) -> None:
         self._window = window_seconds
+        self._max_batch_entries = max_batch_entries
+        self._max_raw_chars = max_raw_chars
         self._batches: dict[str, AnomalyBatch] = {}
-        self._timers: dict[str, asyncio.Task] = {}
-        self._lock = asyncio.Lock()
+        self._deadlines: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task] = set()
         self._callback: BatchCallback | None = None
 
     def set_callback(self, callback: BatchCallback) -> None:
@@ -61,35 +90,58 @@ class AnomalyAccumulator:
         self, device: str, category: str,
         anomalies: list[AnomalyResult], raw_data: str,
     ) -> None:
-        """Add an anomaly entry and (re)start the flush timer for *device*."""
+        """Add an anomaly entry and push back the flush deadline for *device*."""
+        if len(raw_data) > self._max_raw_chars:
+            raw_data = raw_data[:self._max_raw_chars] + "\n... (output truncated)"
         entry = AnomalyEntry(
             category=category, anomalies=anomalies, raw_data=raw_data,
         )
-        async with self._lock:
-            if device not in self._batches:
-                self._batches[device] = AnomalyBatch(device=device)
-            self._batches[device].entries.append(entry)
-
-            # Cancel existing timer (resets the window)
-            existing = self._timers.pop(device, None)
-            if existing is not None:
-                existing.cancel()
-
-            # Start new timer
-            self._timers[device] = asyncio.create_task(
-                self._flush_after(device, self._window),
-            )
+        # No lock needed: nothing below awaits, so the event loop cannot
+        # interleave another submit/flush mid-update.
+        if device not in self._batches:
+            self._batches[device] = AnomalyBatch(device=device)
+        batch = self._batches[device]
+        batch.entries.append(entry)
+
+        loop = asyncio.get_running_loop()
+        if len(batch.entries) >= self._max_batch_entries:
+            # Full — dispatch now; the queued heap entry goes stale
+            self._deadlines.pop(device, None)
+            self._spawn_flush(loop, device)
+            return
 
-    async def _flush_after(self, device: str, delay: float) -> None:
-        """Wait *delay* seconds then flush *device*'s batch."""
-        await asyncio.sleep(delay)
-        await self._flush(device)
+        # Reset the window — any older heap entry for device goes stale
+        deadline = loop.time() + self._window
+        self._deadlines[device] = deadline
+        heapq.heappush(self._heap, (deadline, device))
+
+        # New deadlines are never earlier than queued ones, so an armed
+        # timer already points at the heap's head
+        if self._timer is None:
+            self._timer = loop.call_at(self._heap[0][0], self._on_timer)
+
+    def _on_timer(self) -> None:
+        """Dispatch every batch whose deadline has passed, then re-arm."""
+        self._timer = None
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, device = heapq.heappop(self._heap)
+            if self._deadlines.get(device) != deadline:
+                continue  # superseded by a later submit
+            self._spawn_flush(loop, device)
+        if self._heap:
+            self._timer = loop.call_at(self._heap[0][0], self._on_timer)
+
+    def _spawn_flush(self, loop: asyncio.AbstractEventLoop, device: str) -> None:
+        task = loop.create_task(self._flush(device))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
 
     async def _flush(self, device: str) -> None:
         """Atomically pop the batch for *device* and dispatch to callback."""
-        async with self._lock:
-            batch = self._batches.pop(device, None)
-            self._timers.pop(device, None)
+        batch = self._batches.pop(device, None)
+        self._deadlines.pop(device, None)
 
         if batch is None or not batch.entries:
             return
@@ -104,24 +156,26 @@ class AnomalyAccumulator:
             logger.error("Accumulator callback failed for %s: %s", device, exc)
 
     async def flush_all(self) -> None:
-        """Flush all pending batches immediately."""
-        async with self._lock:
-            devices = list(self._batches.keys())
-
-        for device in devices:
-            await self._flush(device)
+        """Flush all pending batches immediately, dispatching them concurrently."""
+        devices = list(self._batches.keys())
+        if devices:
+            await asyncio.gather(
+                *(self._flush(device) for device in devices),
+                return_exceptions=True,
+            )
 
     async def stop(self) -> None:
-        """Cancel all pending timers and flush remaining batches."""
-        async with self._lock:
-            timers = list(self._timers.values())
-            self._timers.clear()
-
-        for timer in timers:
-            timer.cancel()
-            try:
-                await timer
-            except asyncio.CancelledError:
-                pass
+        """Cancel the timer and in-flight flushes, then flush remaining batches."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        tasks = list(self._flush_tasks)
+        self._flush_tasks.clear()
+        self._heap.clear()
+
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
 
         await self.flush_all()
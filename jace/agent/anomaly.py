@@ -2,13 +2,13 @@
 
 from __future__ import annotations
 
-import math
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 
 from jace.agent.metrics_store import MetricPoint, MetricsStore
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AnomalyResult:
     metric: str
     value: float
@@ -16,17 +16,29 @@ class AnomalyResult:
     stddev: float
     z_score: float
     unit: str
+    _line: str | None = field(
+        default=None, init=False, repr=False, compare=False,
+    )
 
     def to_context_line(self) -> str:
-        return (
-            f"ANOMALY: {self.metric} = {self.value}{self.unit} "
-            f"(mean={self.mean:.2f}, stddev={self.stddev:.2f}, "
-            f"z-score={self.z_score:.2f})"
-        )
+        # Formatted on first use and reused across prompt rebuilds
+        if self._line is None:
+            object.__setattr__(self, "_line", (
+                f"ANOMALY: {self.metric} = {self.value}{self.unit} "
+                f"(mean={self.mean:.2f}, stddev={self.stddev:.2f}, "
+                f"z-score={self.z_score:.2f})"
+            ))
+        return self._line
 
 
 class AnomalyDetector:
-    """Stateless Z-score anomaly detector backed by MetricsStore."""
+    """Z-score anomaly detector backed by MetricsStore.
+
+    The ``(mean, stddev)`` baseline for each ``(device, metric)`` is memoized
+    against the store's version stamp, so it is reused until a point is
+    recorded or evicted — and for at most *stats_ttl* seconds (default:
+    1/20th of the window), which bounds staleness from time-based expiry.
+    """
 
     def __init__(
         self,
@@ -34,49 +46,125 @@ class AnomalyDetector:
         z_threshold: float = 3.0,
         window_hours: int = 24,
         min_samples: int = 10,
+        stats_ttl: float | None = None,
     ) -> None:
         self._store = store
         self._z_threshold = z_threshold
         self._window_hours = window_hours
         self._min_samples = min_samples
+        self._stats_ttl = (
+            stats_ttl if stats_ttl is not None else window_hours * 3600 / 20
+        )
+        # (device, metric) → (version, expires_at, (count, mean, stddev))
+        self._stats_cache: dict[
+            tuple[str, str], tuple[int, float, tuple[int, float, float]]
+        ] = {}
 
     async def check(
         self, device: str, metric: str, current_value: float, unit: str = "",
     ) -> AnomalyResult | None:
-        points = await self._store.query(
-            device, metric, since_hours=self._window_hours,
-        )
-        if len(points) < self._min_samples:
-            return None
-
-        values = [p.value for p in points]
-        mean = sum(values) / len(values)
-        variance = sum((v - mean) ** 2 for v in values) / len(values)
-        stddev = math.sqrt(variance)
-
-        if stddev == 0:
+        baseline = self._baseline(await self._window_stats(device, metric))
+        if baseline is None:
             return None
-
-        z_score = abs(current_value - mean) / stddev
-        if z_score >= self._z_threshold:
-            return AnomalyResult(
-                metric=metric,
-                value=current_value,
-                mean=mean,
-                stddev=stddev,
-                z_score=z_score,
-                unit=unit,
-            )
-        return None
+        return self._score(metric, current_value, unit, *baseline)
 
     async def check_many(
         self, device: str, points: list[MetricPoint],
     ) -> list[AnomalyResult]:
+        """Check *points* against their windows, fetching every stale metric's
+        stats in one batched store call."""
+        now = time.monotonic()
+        all_stats: dict[str, tuple[int, float, float]] = {}
+        stale: list[str] = []
+        for metric in dict.fromkeys(p.metric for p in points):
+            cached = self._cached_stats(device, metric, now)
+            if cached is None:
+                stale.append(metric)
+            else:
+                all_stats[metric] = cached
+        if stale:
+            fresh = await self._store.stats_many(
+                device, stale, since_hours=self._window_hours,
+            )
+            for metric, stats in fresh.items():
+                self._cache_stats(device, metric, now, stats)
+                all_stats[metric] = stats
+
+        # Gate each metric once; points on gated metrics skip scoring
+        baselines = {m: self._baseline(stats) for m, stats in all_stats.items()}
+
         results: list[AnomalyResult] = []
         for point in points:
-            result = await self.check(
-                device, point.metric, point.value, point.unit,
-            )
+            baseline = baselines[point.metric]
+            if baseline is None:
+                continue
+            result = self._score(point.metric, point.value, point.unit, *baseline)
             if result:
                 results.append(result)
         return results
+
+    async def _window_stats(
+        self, device: str, metric: str,
+    ) -> tuple[int, float, float]:
+        """Return ``(count, mean, stddev)``, served from cache while unchanged."""
+        now = time.monotonic()
+        cached = self._cached_stats(device, metric, now)
+        if cached is not None:
+            return cached
+
+        stats = await self._store.stats(
+            device, metric, since_hours=self._window_hours,
+        )
+        self._cache_stats(device, metric, now, stats)
+        return stats
+
+    def _cached_stats(
+        self, device: str, metric: str, now: float,
+    ) -> tuple[int, float, float] | None:
+        cached = self._stats_cache.get((device, metric))
+        if (cached is not None
+                and cached[0] == self._store.version(device, metric)
+                and cached[1] > now):
+            return cached[2]
+        return None
+
+    def _cache_stats(
+        self, device: str, metric: str, now: float,
+        stats: tuple[int, float, float],
+    ) -> None:
+        if self._stats_ttl > 0:
+            # Read the version after the fetch: eviction during it bumps it
+            self._stats_cache[(device, metric)] = (
+                self._store.version(device, metric),
+                now + self._stats_ttl,
+                stats,
+            )
+
+    def _baseline(
+        self, stats: tuple[int, float, float],
+    ) -> tuple[float, float] | None:
+        """Return ``(mean, stddev)`` if the window can score points, else None."""
+        count, mean, stddev = stats
+        if count < self._min_samples:
+            return None
+
+        if stddev == 0:
+            return None
+        return mean, stddev
+
+    def _score(
+        self, metric: str, current_value: float, unit: str,
+        mean: float, stddev: float,
+    ) -> AnomalyResult | None:
+        # Compare against threshold * stddev; divide only for actual hits
+        diff = abs(current_value - mean)
+        if diff < self._z_threshold * stddev:
+            return None
+        return AnomalyResult(
+            metric=metric,
+            value=current_value,
+            mean=mean,
+            stddev=stddev,
+            z_score=diff / stddev,
+            unit=unit,
+        )
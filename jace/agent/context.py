@@ -2,16 +2,46 @@
 
 from __future__ import annotations
 
+from collections import deque
+
 from jace.llm.base import Message, Role
 
+# Default size budget for message content: roughly 100k tokens at the usual
+# ~4 characters per token
+DEFAULT_MAX_CHARS = 400_000
+
 
 class ConversationContext:
-    """Manages conversation history for an LLM interaction."""
+    """Manages conversation history for an LLM interaction.
+
+    Messages are not trimmed on append.  Long-lived contexts are bounded by
+    compaction (see ``needs_compaction``/``compact``), which triggers on
+    either message count or total content size; short-lived ones are
+    bounded by the tool loop's iteration limit.  ``_trim`` remains as a
+    manual safety net.
+    """
 
-    def __init__(self, max_messages: int = 50) -> None:
-        self._messages: list[Message] = []
+    __slots__ = (
+        "_messages", "_max_messages", "_summary", "_summary_pair",
+        "_messages_view", "_max_chars", "_chars",
+    )
+
+    def __init__(self, max_messages: int = 50,
+                 max_chars: int = DEFAULT_MAX_CHARS) -> None:
+        # Unbounded on purpose: compaction (not silent eviction) decides what
+        # to drop, so tool-call/tool-result pairs are never split.  A deque
+        # makes trimming from the front O(1) per message.
+        self._messages: deque[Message] = deque()
         self._max_messages = max_messages
         self._summary: str | None = None
+        # Synthetic (user, assistant) pair prepended while a summary is set
+        self._summary_pair: tuple[Message, Message] | None = None
+        # Built lazily by ``messages``; reset (never mutated) on every change
+        self._messages_view: list[Message] | None = None
+        self._max_chars = max_chars
+        # Running total of message content length, kept in step with
+        # _messages so the size check never rescans the history
+        self._chars = 0
 
     @property
     def message_count(self) -> int:
@@ -20,41 +50,81 @@ class ConversationContext:
 
     @property
     def needs_compaction(self) -> bool:
-        """True when messages reach 80% of capacity."""
-        return len(self._messages) >= int(self._max_messages * 0.8)
+        """True when message count or content size reaches 80% of capacity."""
+        return (len(self._messages) >= int(self._max_messages * 0.8)
+                or self._chars >= int(self._max_chars * 0.8))
 
     def add_user(self, content: str) -> None:
-        self._messages.append(Message(role=Role.USER, content=content))
+        self._append(Message(role=Role.USER, content=content))
 
     def add_assistant(self, message: Message) -> None:
-        self._messages.append(message)
+        self._append(message)
 
     def add_tool_result(self, tool_call_id: str, content: str) -> None:
-        self._messages.append(Message(
+        self._append(Message(
             role=Role.TOOL, content=content, tool_call_id=tool_call_id,
         ))
 
+    def _append(self, message: Message) -> None:
+        self._messages.append(message)
+        self._chars += len(message.content)
+        self._messages_view = None
+
+    def _popleft(self) -> None:
+        self._chars -= len(self._messages.popleft().content)
+
     @property
     def messages(self) -> list[Message]:
-        """Return messages, prepending synthetic summary pair if set."""
+        """Return messages, prepending synthetic summary pair if set.
+
+        The list is cached until the next mutation and shared between
+        callers, so treat it as read-only (copy it before appending).
+        """
+        if self._messages_view is None:
+            self._messages_view = self._build_messages()
+        return self._messages_view
+
+    def _build_messages(self) -> list[Message]:
         result: list[Message] = []
-        if self._summary:
-            result.append(Message(
-                role=Role.USER,
-                content=f"[Previous conversation summary]: {self._summary}",
-            ))
-            result.append(Message(
-                role=Role.ASSISTANT,
-                content="Understood. I have context from our earlier conversation.",
-            ))
+        if self._summary_pair is not None:
+            result.extend(self._summary_pair)
         result.extend(self._messages)
         return result
 
     def compact(self, summary: str, keep_recent: int = 10) -> None:
         """Replace older messages with a summary, keeping last N messages."""
         self._summary = summary
-        if len(self._messages) > keep_recent:
-            self._messages = self._messages[-keep_recent:]
+        self._summary_pair = None
+        if summary:
+            self._summary_pair = (
+                Message(
+                    role=Role.USER,
+                    content=f"[Previous conversation summary]: {summary}",
+                ),
+                Message(
+                    role=Role.ASSISTANT,
+                    content="Understood. I have context from our earlier conversation.",
+                ),
+            )
+        while len(self._messages) > keep_recent:
+            self._popleft()
+        self._messages_view = None
+
+    def clone(self, *, extra_capacity: int = 0) -> ConversationContext:
+        """Return an independent copy with room for *extra_capacity* more.
+
+        The summary pair and messages are shared (messages are immutable
+        in practice); only the containers are copied.
+        """
+        copy = ConversationContext(
+            max_messages=len(self._messages) + extra_capacity,
+            max_chars=self._max_chars,
+        )
+        copy._messages = self._messages.copy()
+        copy._chars = self._chars
+        copy._summary = self._summary
+        copy._summary_pair = self._summary_pair
+        return copy
 
     @property
     def raw_messages(self) -> list[Message]:
@@ -63,9 +133,13 @@ class ConversationContext:
 
     def clear(self) -> None:
         self._messages.clear()
+        self._chars = 0
         self._summary = None
+        self._summary_pair = None
+        self._messages_view = None
 
     def _trim(self) -> None:
         """Safety-net trim — keeps most recent messages if limit exceeded."""
-        if len(self._messages) > self._max_messages:
-            self._messages = self._messages[-self._max_messages:]
+        while len(self._messages) > self._max_messages:
+            self._popleft()
+        self._messages_view = None
@@ -3,9 +3,16 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import logging
+import re
 import shlex
+import socket
+import sys
+import time
+from collections import OrderedDict
+from string import Formatter
 from typing import Any, Callable, Awaitable
 
 from jace.agent.accumulator import AnomalyAccumulator, AnomalyBatch
@@ -15,21 +22,59 @@ if TYPE_CHECKING:
     from jace.mcp.manager import MCPManager
 from jace.agent.anomaly import AnomalyDetector, AnomalyResult
 from jace.agent.context import ConversationContext
-from jace.agent.findings import Finding, FindingsTracker, Severity
+from jace.agent.findings import (
+    SEVERITY_BY_NAME,
+    SEVERITY_RANK,
+    Finding,
+    FindingsTracker,
+    Severity,
+)
 from jace.agent.heartbeat import HeartbeatManager
 from jace.agent.memory import MemoryStore
 from jace.agent.metrics_store import MetricPoint, MetricsStore
 from jace.agent.watch import Watch, WatchManager
-from jace.agent.scheduler import Scheduler
+from jace.agent.scheduler import Scheduler, stagger_offset
 from jace.checks.registry import CheckRegistry
 from jace.config.settings import Settings
 from jace.device.manager import DeviceManager
-from jace.llm.base import LLMClient, Message, Response, Role, ToolCall
+from jace.llm.base import (
+    LLMClient, Message, Response, Role, ToolCall, ToolDefinition,
+)
 from jace.llm.tools import AGENT_TOOLS
 from jace.metrics import EXTRACTORS
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+def _json_loads(text: str) -> Any:
+    """Parse JSON with orjson when installed, else the stdlib."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _json_dumps(obj: Any) -> str:
+    """Serialize a tool result as indented JSON, via orjson when installed.
+
+    Unknown types are stringified; anything orjson rejects outright (e.g.
+    integers beyond 64 bits) falls back to the stdlib encoder.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj, default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+            ).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2, default=str)
+
+
 SYSTEM_PROMPT = """\
 You are an expert Junos network engineer AI agent. You autonomously monitor \
 Junos MX series routers, analyze health data, troubleshoot issues, and audit \
@@ -250,6 +295,93 @@ Summarize the conversation above in a compact paragraph. Focus on:
 Be concise — this summary will replace older messages to free context space.\
 """
 
+
+class _PromptTemplate:
+    """A ``str.format`` template parsed once at import.
+
+    ``format()`` joins the pre-split literal chunks with the substituted
+    values, so the template text is not re-scanned on every call.
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, template: str) -> None:
+        self._parts: list[tuple[str, str | None, str]] = []
+        for literal, field_name, spec, conversion in Formatter().parse(template):
+            if conversion or (field_name is not None and not field_name.isidentifier()):
+                raise ValueError(f"Unsupported placeholder: {{{field_name}}}")
+            self._parts.append((literal, field_name, spec or ""))
+
+    def format(self, **values: Any) -> str:
+        out: list[str] = []
+        for literal, field_name, spec in self._parts:
+            out.append(literal)
+            if field_name is not None:
+                out.append(format(values[field_name], spec))
+        return "".join(out)
+
+
+_ANALYSIS_PROMPT = _PromptTemplate(ANALYSIS_PROMPT_TEMPLATE)
+_ANOMALY_PROMPT = _PromptTemplate(ANOMALY_PROMPT_TEMPLATE)
+_CORRELATED_ANOMALY_PROMPT = _PromptTemplate(CORRELATED_ANOMALY_PROMPT_TEMPLATE)
+_HEARTBEAT_PROMPT = _PromptTemplate(HEARTBEAT_PROMPT_TEMPLATE)
+_PROFILE_PROMPT = _PromptTemplate(PROFILE_PROMPT_TEMPLATE)
+
+
+class _ResponseCache:
+    """Bounded LRU of final (tool-free) LLM responses with a TTL.
+
+    Keys are digests of everything that shapes a reply, so a hit means the
+    exact same request was answered within the last ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 256) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        # key → (expires_at, response)
+        self._entries: OrderedDict[bytes, tuple[float, Response]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    @staticmethod
+    def key(messages: list[Message], tools: list[ToolDefinition] | None,
+            system: str | None, max_tokens: int, model: str) -> bytes:
+        payload = [
+            [
+                (m.role.value, m.content, m.tool_call_id, m.name,
+                 [(tc.id, tc.name, tc.arguments) for tc in m.tool_calls or ()])
+                for m in messages
+            ],
+            # Full definitions: a tool whose schema or description changed
+            # under the same name (e.g. from an MCP server) must miss
+            [(t.name, t.description, t.parameters) for t in tools or ()],
+            system, max_tokens, model,
+        ]
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).digest()
+
+    def get(self, key: bytes) -> Response | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: bytes, response: Response) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+# Trailing request appended to the conversation when compacting
+_SUMMARIZE_MESSAGE = Message(role=Role.USER, content=SUMMARIZE_PROMPT)
+
 # Notification callback type
 NotifyCallback = Callable[[Finding, bool], Awaitable[None]]  # (finding, is_new)
 
@@ -268,6 +400,80 @@ SHELL_BLOCKED_PATTERNS: list[str] = [
 
 SHELL_COMMAND_TIMEOUT = 60
 
+# Concurrent tool calls allowed to talk to any one device
+DEVICE_TOOL_CONCURRENCY = 4
+
+# Fallbacks for _extract_json_array, tried in order: ```json fence, then
+# bare ``` fence (balanced bracket spans are scanned after these)
+_JSON_ARRAY_PATTERNS = (
+    re.compile(r'```json\s*(\[.*?\])\s*```', re.DOTALL),
+    re.compile(r'```\s*(\[.*?\])\s*```', re.DOTALL),
+)
+
+
+# Characters _bracket_spans reacts to; everything else is skipped in C
+_BRACKET_TOKENS = re.compile(r'[\[\]"\\]')
+
+
+def _bracket_spans(text: str) -> list[tuple[int, int]]:
+    """Return ``(start, end)`` of every balanced ``[...]`` span, by start.
+
+    One stack-based pass over the text.  Brackets inside JSON strings
+    (quotes opened within a bracket) are ignored; unmatched brackets
+    simply never produce a span.
+    """
+    spans: list[tuple[int, int]] = []
+    stack: list[int] = []
+    in_string = False
+    escaped_at = -1
+    for match in _BRACKET_TOKENS.finditer(text):
+        i = match.start()
+        ch = text[i]
+        if in_string:
+            if i == escaped_at:
+                continue
+            if ch == "\\":
+                escaped_at = i + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == "[":
+            stack.append(i)
+        elif ch == "]":
+            if stack:
+                spans.append((stack.pop(), i))
+        elif ch == '"' and stack:
+            in_string = True
+    spans.sort()
+    return spans
+
+
+# Tools whose "device" argument is resolved to a device key before dispatch
+_DEVICE_TOOLS = frozenset({
+    "run_command", "get_config", "get_device_facts",
+    "run_health_check", "get_metrics", "compare_config",
+    "profile_device",
+})
+
+# Tools that are a single round-trip to the device and hold one of its
+# DEVICE_TOOL_CONCURRENCY slots.  run_health_check and profile_device are
+# left out: they start LLM tool loops that call these tools themselves.
+_DEVICE_IO_TOOLS = frozenset({
+    "run_command", "get_config", "get_device_facts", "compare_config",
+})
+
+# Analysis replies longer than this are parsed in a worker thread
+PARSE_OFFLOAD_THRESHOLD = 64 * 1024
+
+# Upper bound on how long a cached system prompt can miss memory files
+# edited outside the agent
+SYSTEM_PROMPT_CACHE_TTL = 60.0
+
+# Findings queued for the notify callback before producers have to wait
+NOTIFY_QUEUE_SIZE = 1000
+
+# How long stop_monitoring() waits for queued notifications to drain
+NOTIFY_DRAIN_TIMEOUT = 5.0
+
 
 class AgentCore:
     """Main agent — runs background health checks and handles interactive queries."""
@@ -304,8 +510,46 @@ class AgentCore:
         self._interactive_ctx = ConversationContext()
         self._notify_callback: NotifyCallback | None = None
         self._approval_callback: ApprovalCallback | None = None
+        self._approval_lock = asyncio.Lock()
+        # device key → semaphore bounding concurrent device-I/O tool calls
+        self._device_slots: dict[str, asyncio.Semaphore] = {}
         self._status_callback: StatusCallback | None = None
         self._heartbeat_task: asyncio.Task | None = None
+        # Notifications are delivered by a worker so a slow callback never
+        # stalls analysis; the bounded queue pushes back if it falls behind
+        self._notify_queue: asyncio.Queue[tuple[Finding, bool]] = asyncio.Queue(
+            maxsize=NOTIFY_QUEUE_SIZE,
+        )
+        self._notify_task: asyncio.Task | None = None
+        # (category, device) → (completion future, user_triggered)
+        self._inflight_checks: dict[
+            tuple[str, str], tuple[asyncio.Future, bool]
+        ] = {}
+        # (key, expires_at, prompt) — see _build_system_prompt
+        self._base_system_prompt = settings.llm.system_prompt or SYSTEM_PROMPT
+        self._system_prompt_cache: tuple[tuple, float, str] | None = None
+        # (MCP tools it was built from, combined tool list) — see _available_tools
+        self._tools_cache: tuple[
+            tuple[ToolDefinition, ...], list[ToolDefinition]
+        ] | None = None
+        self._response_cache = _ResponseCache(settings.llm.response_cache_ttl)
+        # Built-in tool name → handler; anything else is offered to MCP
+        self._tool_handlers: dict[str, Callable[[dict[str, Any]], Awaitable[str]]] = {
+            "run_command": self._tool_run_command,
+            "get_config": self._tool_get_config,
+            "get_device_facts": self._tool_get_device_facts,
+            "list_devices": self._tool_list_devices,
+            "get_findings": self._tool_get_findings,
+            "run_health_check": self._tool_run_health_check,
+            "get_metrics": self._tool_get_metrics,
+            "compare_config": self._tool_compare_config,
+            "manage_heartbeat": self._tool_manage_heartbeat,
+            "manage_watches": self._tool_manage_watches,
+            "save_memory": self._tool_save_memory,
+            "read_memory": self._tool_read_memory,
+            "profile_device": self._tool_profile_device,
+            "run_shell": self._tool_run_shell,
+        }
 
     def get_chat_history(self, limit: int = 50) -> list[dict[str, str]]:
         """Return simplified chat history (user/assistant messages only)."""
@@ -356,6 +600,7 @@ class AgentCore:
             self._heartbeat_task = None
             logger.info("Heartbeat loop stopped")
         await self._scheduler.stop()
+        await self._stop_notify_worker()
 
     async def handle_user_input(self, user_input: str) -> str:
         """Process a user query through the LLM with tool use."""
@@ -387,7 +632,7 @@ class AgentCore:
             else:
                 outputs[cmd] = f"(error: {result.error})"
 
-        prompt = PROFILE_PROMPT_TEMPLATE.format(
+        prompt = _PROFILE_PROMPT.format(
             device=device_name,
             config=outputs[commands[0]],
             routes=outputs[commands[1]],
@@ -405,18 +650,56 @@ class AgentCore:
         return profile
 
     async def profile_all_devices(self) -> None:
-        """Profile all connected devices that don't already have a profile."""
-        devices = self._device_manager.get_connected_devices()
-        for name in devices:
+        """Profile all connected devices that don't already have a profile.
+
+        Devices are profiled concurrently so their LLM round-trips overlap.
+        """
+        pending: list[str] = []
+        for name in self._device_manager.get_connected_devices():
             if self._memory_store:
                 existing = self._memory_store.get_device(name)
                 if "## Device Profile" in existing:
                     logger.info("Device %s already profiled, skipping", name)
                     continue
-            await self.profile_device(name)
+            pending.append(name)
+
+        results = await asyncio.gather(
+            *(self.profile_device(name) for name in pending),
+            return_exceptions=True,
+        )
+        for name, result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error("Profiling %s failed: %s", name, result)
 
     async def _run_check(self, category: str, device_name: str,
                          *, _user_triggered: bool = False) -> None:
+        """Run a health check, joining an identical run already in flight.
+
+        A user-triggered caller only joins another user-triggered run: a
+        scheduled run may defer its findings to the anomaly accumulator.
+        """
+        key = (category, device_name)
+        inflight = self._inflight_checks.get(key)
+        if inflight is not None and (inflight[1] or not _user_triggered):
+            logger.debug("Joining in-flight %s check on %s",
+                         category, device_name)
+            await asyncio.shield(inflight[0])
+            return
+
+        done = asyncio.get_running_loop().create_future()
+        self._inflight_checks[key] = (done, _user_triggered)
+        try:
+            await self._run_check_once(
+                category, device_name, _user_triggered=_user_triggered,
+            )
+        finally:
+            if self._inflight_checks.get(key, (None,))[0] is done:
+                del self._inflight_checks[key]
+            if not done.done():
+                done.set_result(None)
+
+    async def _run_check_once(self, category: str, device_name: str,
+                              *, _user_triggered: bool = False) -> None:
         """Run a health check category and analyze results with the LLM."""
         logger.info("Running %s check on %s", category, device_name)
 
@@ -432,13 +715,6 @@ class AgentCore:
             category, device_name, results,
         )
 
-        # Format raw data
-        data_parts = []
-        for cmd, result in results.items():
-            status = "SUCCESS" if result.success else f"FAILED: {result.error}"
-            data_parts.append(f"--- {cmd} [{status}] ---\n{result.output}\n")
-        data_text = "\n".join(data_parts)
-
         # Decide whether to call the LLM
         has_extractor = category in EXTRACTORS
 
@@ -447,6 +723,9 @@ class AgentCore:
             logger.info("%s check on %s: Normal", category, device_name)
             return
 
+        # Format raw data only once the LLM (or accumulator) needs it
+        data_text = self._format_results(results)
+
         # Anomalies detected or non-metric category (config) — call LLM
         if anomalies:
             logger.info("%s check on %s: %d anomaly(s) detected",
@@ -463,14 +742,14 @@ class AgentCore:
             context = self._gather_investigation_context(
                 device_name, category,
             )
-            prompt = ANOMALY_PROMPT_TEMPLATE.format(
+            prompt = _ANOMALY_PROMPT.format(
                 device=device_name, category=category,
                 anomalies=anomaly_text, data=data_text,
                 context=context,
             )
         else:
             # Config category — use general template
-            prompt = ANALYSIS_PROMPT_TEMPLATE.format(
+            prompt = _ANALYSIS_PROMPT.format(
                 device=device_name, category=category, data=data_text,
             )
 
@@ -484,6 +763,15 @@ class AgentCore:
             logger.error("LLM analysis failed for %s/%s: %s",
                          category, device_name, exc)
 
+    @staticmethod
+    def _format_results(results: dict[str, Any]) -> str:
+        """Render command results as the raw-data block used in prompts."""
+        return "\n".join([
+            f"--- {cmd} [{'SUCCESS' if r.success else f'FAILED: {r.error}'}] ---\n"
+            f"{r.output}\n"
+            for cmd, r in results.items()
+        ])
+
     def _gather_investigation_context(
         self, device_name: str, category: str | None = None,
     ) -> str:
@@ -493,27 +781,23 @@ class AgentCore:
         When *category* is ``None`` (batch mode), all same-device findings
         are included.
         """
-        lines: list[str] = []
-
-        # Same-device findings (exclude current category if specified)
-        same_device = self._findings.get_active(device=device_name)
-        for f in same_device:
-            if category is not None and f.category == category:
-                continue
-            lines.append(
-                f"  [{f.severity.value.upper()}] {f.category}: "
-                f"{f.title} — {f.detail}"
-            )
+        # Same-device findings (exclude current category if specified);
+        # get_active() serves these from the tracker's device/severity indexes
+        lines = [
+            f"  [{f.severity.value.upper()}] {f.category}: "
+            f"{f.title} — {f.detail}"
+            for f in self._findings.get_active(device=device_name)
+            if category is None or f.category != category
+        ]
 
         # Fleet-wide critical/warning findings on other devices
-        for sev in (Severity.CRITICAL, Severity.WARNING):
-            for f in self._findings.get_active(severity=sev):
-                if f.device == device_name:
-                    continue
-                lines.append(
-                    f"  [{f.severity.value.upper()}] {f.device}/{f.category}: "
-                    f"{f.title}"
-                )
+        lines += [
+            f"  [{f.severity.value.upper()}] {f.device}/{f.category}: "
+            f"{f.title}"
+            for sev in (Severity.CRITICAL, Severity.WARNING)
+            for f in self._findings.get_active(severity=sev)
+            if f.device != device_name
+        ]
 
         if not lines:
             return ""
@@ -528,23 +812,13 @@ class AgentCore:
         logger.info("Investigating correlated anomalies on %s: %s",
                      device, categories)
 
-        # Build per-category blocks
-        category_blocks: list[str] = []
-        for entry in batch.entries:
-            anomaly_text = "\n".join(
-                a.to_context_line() for a in entry.anomalies
-            )
-            block = (
-                f"=== {entry.category} ===\n"
-                f"Detected anomalies:\n{anomaly_text}\n\n"
-                f"Raw command output:\n{entry.raw_data}\n"
-            )
-            category_blocks.append(block)
+        # Per-category blocks are rendered when entries are submitted
+        category_blocks = [entry.block for entry in batch.entries]
 
         context = self._gather_investigation_context(device, category=None)
         categories_str = ", ".join(categories)
 
-        prompt = CORRELATED_ANOMALY_PROMPT_TEMPLATE.format(
+        prompt = _CORRELATED_ANOMALY_PROMPT.format(
             device=device,
             categories=categories_str,
             category_blocks="\n".join(category_blocks),
@@ -563,12 +837,37 @@ class AgentCore:
             logger.error("Correlated anomaly investigation failed for %s: %s",
                          device, exc)
 
+    @staticmethod
+    def _unique_findings(items: list[dict]) -> dict[str, tuple[Severity, dict]]:
+        """Collapse findings that share a title, keeping the most severe.
+
+        On equal severity the later item wins, as it did when every
+        duplicate was written through to the tracker in turn.  Titles are
+        interned: the same issue is reported cycle after cycle, so the
+        tracker's stored title and the new one end up as one object and
+        ``resolve_missing`` matches them by identity.
+        """
+        unique: dict[str, tuple[Severity, dict]] = {}
+        for item in items:
+            title = item.get("title", "Unknown issue")
+            if type(title) is str:
+                title = sys.intern(title)
+            raw_severity = item.get("severity", "info")
+            severity = (
+                SEVERITY_BY_NAME.get(raw_severity, Severity.INFO)
+                if isinstance(raw_severity, str) else Severity.INFO
+            )
+            kept = unique.get(title)
+            if kept is None or SEVERITY_RANK[severity] <= SEVERITY_RANK[kept[0]]:
+                unique[title] = (severity, item)
+        return unique
+
     async def _process_batch_analysis(
         self, device_name: str, categories: list[str], analysis: str,
     ) -> None:
         """Parse LLM analysis from a batched investigation and route
         findings to the correct category trackers."""
-        findings_data = self._extract_json_array(analysis)
+        findings_data = await self._parse_findings(analysis)
 
         # Group findings by category
         by_category: dict[str, list[dict]] = {c: [] for c in categories}
@@ -582,40 +881,23 @@ class AgentCore:
 
         # Process each category like _process_analysis does
         for cat, items in by_category.items():
-            current_titles: set[str] = set()
-
-            for item in items:
-                title = item.get("title", "Unknown issue")
-                current_titles.add(title)
-
-                try:
-                    severity = Severity(item.get("severity", "info"))
-                except ValueError:
-                    severity = Severity.INFO
-
-                finding, is_new = await self._findings.add_or_update(
-                    device=device_name,
-                    severity=severity,
-                    category=cat,
-                    title=title,
-                    detail=item.get("detail", ""),
-                    recommendation=item.get("recommendation", ""),
-                )
-
-                if self._notify_callback and is_new:
-                    await self._notify_callback(finding, is_new)
+            unique = self._unique_findings(items)
+            await self._upsert_findings(device_name, cat, unique)
 
             resolved = await self._findings.resolve_missing(
-                device_name, cat, current_titles,
+                device_name, cat, unique.keys(),
             )
             for finding in resolved:
-                if self._notify_callback:
-                    await self._notify_callback(finding, False)
+                await self._notify(finding, False)
 
     async def _heartbeat_loop(self, interval: int) -> None:
         """Run heartbeat checks on a schedule."""
-        # Stagger initial start
-        stagger = hash("heartbeat") % min(30, interval)
+        # Stagger initial start; keyed per host and storage dir so replicas
+        # spread out while each keeps the same offset across restarts
+        stagger = stagger_offset(
+            f"heartbeat:{socket.gethostname()}:{self._settings.storage.path}",
+            min(30, interval),
+        )
         await asyncio.sleep(stagger)
 
         while True:
@@ -638,7 +920,7 @@ class AgentCore:
             return
 
         logger.info("Running heartbeat cycle")
-        prompt = HEARTBEAT_PROMPT_TEMPLATE.format(instructions=instructions)
+        prompt = _HEARTBEAT_PROMPT.format(instructions=instructions)
 
         ctx = ConversationContext()
         ctx.add_user(prompt)
@@ -656,37 +938,83 @@ class AgentCore:
                                 analysis: str) -> None:
         """Parse LLM analysis and create/update findings."""
         # Extract JSON array from response
-        findings_data = self._extract_json_array(analysis)
-        current_titles: set[str] = set()
+        findings_data = await self._parse_findings(analysis)
+        unique = self._unique_findings(findings_data)
+        await self._upsert_findings(device_name, category, unique)
 
-        for item in findings_data:
-            title = item.get("title", "Unknown issue")
-            current_titles.add(title)
+        # Resolve findings that are no longer reported; the titles are
+        # exactly the keys of ``unique``
+        resolved = await self._findings.resolve_missing(
+            device_name, category, unique.keys(),
+        )
+        for finding in resolved:
+            await self._notify(finding, False)
 
-            try:
-                severity = Severity(item.get("severity", "info"))
-            except ValueError:
-                severity = Severity.INFO
-
-            finding, is_new = await self._findings.add_or_update(
-                device=device_name,
-                severity=severity,
-                category=category,
-                title=title,
-                detail=item.get("detail", ""),
-                recommendation=item.get("recommendation", ""),
+    async def _upsert_findings(
+        self, device_name: str, category: str,
+        unique: dict[str, tuple[Severity, dict]],
+    ) -> None:
+        """Write one category's findings in a single batch; notify new ones."""
+        if not unique:
+            return
+        records = [
+            {
+                "device": device_name,
+                "severity": severity,
+                "category": category,
+                "title": title,
+                "detail": item.get("detail", ""),
+                "recommendation": item.get("recommendation", ""),
+            }
+            for title, (severity, item) in unique.items()
+        ]
+        for finding, is_new in await self._findings.add_or_update_many(records):
+            if is_new:
+                await self._notify(finding, is_new)
+
+    async def _notify(self, finding: Finding, is_new: bool) -> None:
+        """Queue a finding for the notify callback.
+
+        Returns as soon as the finding is queued; only waits when the
+        queue is full.
+        """
+        if self._notify_callback is None:
+            return
+        if self._notify_task is None or self._notify_task.done():
+            self._notify_task = asyncio.create_task(
+                self._notify_worker(), name="notify",
             )
+        await self._notify_queue.put((finding, is_new))
 
-            if self._notify_callback and is_new:
-                await self._notify_callback(finding, is_new)
+    async def _notify_worker(self) -> None:
+        """Deliver queued findings to the notify callback in order."""
+        while True:
+            finding, is_new = await self._notify_queue.get()
+            try:
+                if self._notify_callback is not None:
+                    await self._notify_callback(finding, is_new)
+            except Exception as exc:
+                logger.error("Finding notification failed: %s", exc)
+            finally:
+                self._notify_queue.task_done()
 
-        # Resolve findings that are no longer reported
-        resolved = await self._findings.resolve_missing(
-            device_name, category, current_titles,
-        )
-        for finding in resolved:
-            if self._notify_callback:
-                await self._notify_callback(finding, False)
+    async def _stop_notify_worker(self) -> None:
+        """Let queued notifications drain, then stop the worker."""
+        if self._notify_task is None:
+            return
+        try:
+            await asyncio.wait_for(
+                self._notify_queue.join(), NOTIFY_DRAIN_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %d undelivered notification(s)",
+                           self._notify_queue.qsize())
+        self._notify_task.cancel()
+        try:
+            await self._notify_task
+        except asyncio.CancelledError:
+            pass
+        self._notify_task = None
 
     async def _extract_and_check_metrics(
         self, category: str, device_name: str,
@@ -710,6 +1038,13 @@ class AgentCore:
         if not extracted:
             return []
 
+        # Previous values for all counters, fetched in one query
+        counters = [em.metric for em in extracted if em.is_counter]
+        previous = (
+            await self._metrics_store.latest_many(device_name, counters)
+            if counters else {}
+        )
+
         points: list[MetricPoint] = []
         for em in extracted:
             point = MetricPoint(
@@ -721,7 +1056,7 @@ class AgentCore:
 
             # For counters, compute delta from previous value
             if em.is_counter:
-                prev = await self._metrics_store.latest(device_name, em.metric)
+                prev = previous.get(em.metric)
                 if prev is not None:
                     delta = max(0.0, em.value - prev.value)
                     delta_point = MetricPoint(
@@ -741,15 +1076,26 @@ class AgentCore:
         return anomalies
 
     def _build_system_prompt(self) -> str:
-        """Build system prompt with injected memory context."""
-        base = self._settings.llm.system_prompt or SYSTEM_PROMPT
+        """Build system prompt with injected memory context.
+
+        The result is reused until memory is written, the connected device
+        set changes, or ``SYSTEM_PROMPT_CACHE_TTL`` passes, so consecutive
+        LLM calls send byte-identical system prompts.
+        """
+        base = self._base_system_prompt
         if not self._memory_store:
             return base
         device_names = self._device_manager.get_connected_devices()
+        key = (base, self._memory_store.version, tuple(device_names))
+        now = time.monotonic()
+        cached = self._system_prompt_cache
+        if cached is not None and cached[0] == key and cached[1] > now:
+            return cached[2]
+
         memory_ctx = self._memory_store.build_memory_context(device_names)
-        if not memory_ctx:
-            return base
-        return base + "\n\n" + memory_ctx
+        prompt = base + "\n\n" + memory_ctx if memory_ctx else base
+        self._system_prompt_cache = (key, now + SYSTEM_PROMPT_CACHE_TTL, prompt)
+        return prompt
 
     async def _compact_context(self, ctx: ConversationContext) -> None:
         """Flush important memories then summarize and compact the context."""
@@ -759,14 +1105,7 @@ class AgentCore:
         # 1. Memory flush — run on a disposable copy of the conversation
         if self._memory_store:
             try:
-                flush_ctx = ConversationContext(max_messages=ctx.message_count + 10)
-                for msg in ctx.messages:
-                    if msg.role == Role.USER:
-                        flush_ctx.add_user(msg.content)
-                    elif msg.role == Role.ASSISTANT:
-                        flush_ctx.add_assistant(msg)
-                    elif msg.role == Role.TOOL and msg.tool_call_id:
-                        flush_ctx.add_tool_result(msg.tool_call_id, msg.content)
+                flush_ctx = ctx.clone(extra_capacity=10)
                 flush_ctx.add_user(MEMORY_FLUSH_PROMPT)
                 await self._llm_tool_loop(flush_ctx, max_iterations=5)
             except Exception as exc:
@@ -775,14 +1114,12 @@ class AgentCore:
         # 2. Summarize — single LLM call, no tools
         summary = ""
         try:
-            summary_messages = list(ctx.messages)
-            summary_messages.append(Message(
-                role=Role.USER, content=SUMMARIZE_PROMPT,
-            ))
+            # One sized copy of the cached view; chat() needs a real list
+            # (the logging wrapper takes len() and iterates it twice)
             response = await self._llm.chat(
-                messages=summary_messages,
+                messages=[*ctx.messages, _SUMMARIZE_MESSAGE],
                 tools=None,
-                system=self._settings.llm.system_prompt or SYSTEM_PROMPT,
+                system=self._base_system_prompt,
                 max_tokens=1024,
             )
             summary = response.content or ""
@@ -842,19 +1179,15 @@ class AgentCore:
             await self._compact_context(ctx)
 
         system_prompt = self._build_system_prompt()
-        all_tools = AGENT_TOOLS
-        if self._mcp_manager and self._mcp_manager.tools:
-            all_tools = AGENT_TOOLS + self._mcp_manager.tools
+        all_tools = self._available_tools()
         is_interactive = ctx is self._interactive_ctx
         for _ in range(max_iterations):
             if is_interactive and self._status_callback:
                 self._status_callback("Thinking…")
 
-            response = await self._llm.chat(
-                messages=ctx.messages,
-                tools=all_tools,
-                system=system_prompt,
-                max_tokens=self._settings.llm.max_tokens,
+            response = await self._chat(
+                ctx.messages, all_tools, system_prompt,
+                cacheable=not is_interactive,
             )
 
             if not response.has_tool_calls:
@@ -873,14 +1206,80 @@ class AgentCore:
             )
             ctx.add_assistant(assistant_msg)
 
-            for tool_call in response.tool_calls:
-                if is_interactive and self._status_callback:
+            if is_interactive and self._status_callback:
+                for tool_call in response.tool_calls:
                     self._status_callback(self._tool_status_message(tool_call))
-                result = await self._execute_tool(tool_call)
+            results = await self._execute_tool_calls(response.tool_calls)
+            for tool_call, result in zip(response.tool_calls, results):
                 ctx.add_tool_result(tool_call.id, result)
 
         return "Maximum tool iterations reached."
 
+    def _available_tools(self) -> list[ToolDefinition]:
+        """Built-in plus MCP tools, as one list reused while MCP is unchanged.
+
+        Handing the LLM client the same list each turn lets it reuse its
+        converted tool payload.
+        """
+        if not (self._mcp_manager and self._mcp_manager.tools):
+            return AGENT_TOOLS
+        mcp_tools = tuple(self._mcp_manager.tools)
+        if self._tools_cache is None or self._tools_cache[0] != mcp_tools:
+            self._tools_cache = (mcp_tools, AGENT_TOOLS + list(mcp_tools))
+        return self._tools_cache[1]
+
+    async def _execute_tool_calls(self, tool_calls: list[ToolCall]) -> list[str]:
+        """Run one response's tool calls concurrently, results in call order.
+
+        Calls in a single response are independent.  Identical calls (same
+        name and arguments) share one execution instead of repeating the
+        device round-trip.
+        """
+        running: dict[tuple[str, str], asyncio.Future[str]] = {}
+        futures: list[asyncio.Future[str]] = []
+        for tool_call in tool_calls:
+            key = (
+                tool_call.name,
+                json.dumps(tool_call.arguments, sort_keys=True, default=str),
+            )
+            future = running.get(key)
+            if future is None:
+                future = asyncio.ensure_future(self._execute_tool(tool_call))
+                running[key] = future
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _chat(self, messages: list[Message],
+                    tools: list[ToolDefinition], system: str,
+                    *, cacheable: bool) -> Response:
+        """Call the LLM, answering repeat background requests from cache.
+
+        Only final text replies are cached; a reply that asks for tools
+        must run them to be meaningful, and an API error is transient.
+        """
+        max_tokens = self._settings.llm.max_tokens
+        if not (cacheable and self._response_cache.enabled):
+            return await self._llm.chat(
+                messages=messages, tools=tools, system=system,
+                max_tokens=max_tokens,
+            )
+
+        key = self._response_cache.key(
+            messages, tools, system, max_tokens, self._settings.llm.model,
+        )
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            logger.debug("LLM response served from cache")
+            return cached
+
+        response = await self._llm.chat(
+            messages=messages, tools=tools, system=system,
+            max_tokens=max_tokens,
+        )
+        if not response.has_tool_calls and response.stop_reason != "error":
+            self._response_cache.put(key, response)
+        return response
+
     @staticmethod
     def _is_shell_blocked(command: str) -> str | None:
         """Return a reason string if the command is blocked, else None."""
@@ -920,287 +1319,354 @@ class AgentCore:
 
         try:
             # Resolve device identifiers for device-targeting tools
-            _device_tools = {
-                "run_command", "get_config", "get_device_facts",
-                "run_health_check", "get_metrics", "compare_config",
-                "profile_device",
-            }
-            if name in _device_tools:
+            if name in _DEVICE_TOOLS:
                 err = self._resolve_device_arg(args)
                 if err:
                     return f"Error: {err}"
 
-            if name == "run_command":
-                result = await self._device_manager.run_command(
-                    args["device"], args["command"],
-                )
-                if result.success:
-                    return result.output or "(no output)"
-                return f"Error: {result.error}"
-
-            elif name == "get_config":
-                return await self._device_manager.get_config(
-                    args["device"],
-                    section=args.get("section"),
-                    format=args.get("format", "text"),
-                )
+            handler = self._tool_handlers.get(name)
+            if handler is not None:
+                if name in _DEVICE_IO_TOOLS:
+                    async with self._device_slot(args["device"]):
+                        return await handler(args)
+                return await handler(args)
+            if self._mcp_manager and self._mcp_manager.has_tool(name):
+                return await self._mcp_manager.call_tool(name, args)
+            return f"Unknown tool: {name}"
 
-            elif name == "get_device_facts":
-                facts = await self._device_manager.get_facts(args["device"])
-                return json.dumps(facts, indent=2, default=str)
+        except Exception as exc:
+            logger.error("Tool execution error (%s): %s", name, exc, exc_info=True)
+            return f"Tool error: {type(exc).__name__}: {exc}"
 
-            elif name == "list_devices":
-                devices = self._device_manager.list_devices(
-                    category=args.get("category"),
-                )
-                result = []
-                for d in devices:
-                    entry: dict = {
-                        "name": d.name, "host": d.host,
-                        "device_key": d.device_key,
-                        "status": d.status.value,
-                        "model": d.model, "version": d.version,
-                    }
-                    if d.category:
-                        entry["category"] = d.category
-                    if d.error:
-                        entry["error"] = d.error
-                    result.append(entry)
-                return json.dumps(result, indent=2)
-
-            elif name == "get_findings":
-                device = args.get("device")
-                if device:
-                    try:
-                        device = self._device_manager.resolve_device(device)
-                    except (KeyError, ValueError) as exc:
-                        return f"Error: {exc}"
-                findings = self._findings.get_active(
-                    device=device,
-                    severity=Severity(args["severity"]) if "severity" in args else None,
-                    category=args.get("category"),
-                )
-                return json.dumps([f.to_dict() for f in findings], indent=2)
+    def _device_slot(self, device: str) -> asyncio.Semaphore:
+        """Return the semaphore limiting concurrent tool I/O to *device*."""
+        slot = self._device_slots.get(device)
+        if slot is None:
+            slot = self._device_slots[device] = asyncio.Semaphore(
+                DEVICE_TOOL_CONCURRENCY,
+            )
+        return slot
 
-            elif name == "run_health_check":
-                await self._run_check(
-                    args["category"], args["device"],
-                    _user_triggered=True,
-                )
-                findings = self._findings.get_active(
-                    device=args["device"], category=args["category"],
-                )
-                if findings:
-                    return json.dumps([f.to_dict() for f in findings], indent=2)
-                return "Health check completed. No issues found."
-
-            elif name == "get_metrics":
-                if not self._metrics_store:
-                    return "Metrics store not configured."
-                device = args["device"]
-                metric = args.get("metric")
-                if not metric:
-                    names = await self._metrics_store.list_metrics(device)
-                    if not names:
-                        return "No metrics recorded for this device yet."
-                    return json.dumps(names, indent=2)
-                since = args.get("since_hours", 24)
-                points = await self._metrics_store.query(
-                    device, metric, since_hours=since,
-                )
-                if not points:
-                    return f"No data for metric '{metric}' in the last {since}h."
-                return json.dumps([p.to_dict() for p in points], indent=2)
-
-            elif name == "compare_config":
-                rollback = args.get("rollback", 1)
-                result = await self._device_manager.run_command(
-                    args["device"],
-                    f"show configuration | compare rollback {rollback}",
-                )
-                return result.output if result.success else f"Error: {result.error}"
-
-            elif name == "manage_heartbeat":
-                if not self._heartbeat_manager:
-                    return "Heartbeat not configured."
-                action = args["action"]
-                if action == "list":
-                    return self._heartbeat_manager.list_instructions()
-                elif action == "add":
-                    return self._heartbeat_manager.add_instruction(
-                        args["instruction"],
-                    )
-                elif action == "remove":
-                    return self._heartbeat_manager.remove_instruction(
-                        args["index"],
-                    )
-                elif action == "replace":
-                    return self._heartbeat_manager.replace_instructions(
-                        args["instruction"],
-                    )
-                return f"Unknown heartbeat action: {action}"
-
-            elif name == "manage_watches":
-                if not self._watch_manager:
-                    return "Watch manager not configured."
-                action = args["action"]
-                if action == "list":
-                    watches = self._watch_manager.list_watches()
-                    if not watches:
-                        return "No active watches."
-                    return json.dumps([
-                        {"id": w.id, "device": w.device,
-                         "command": w.command, "metric_name": w.metric_name,
-                         "interval": w.interval, "parse_pattern": w.parse_pattern,
-                         "unit": w.unit}
-                        for w in watches
-                    ], indent=2)
-                elif action == "add":
-                    for field in ("device", "command", "metric_name",
-                                  "parse_pattern"):
-                        if field not in args:
-                            return f"Missing required parameter: {field}"
-                    # Resolve device for watch add
-                    err = self._resolve_device_arg(args)
-                    if err:
-                        return f"Error: {err}"
-                    watch = Watch(
-                        id="",
-                        device=args["device"],
-                        command=args["command"],
-                        metric_name=args["metric_name"],
-                        parse_pattern=args["parse_pattern"],
-                        interval=args.get("interval", 60),
-                        unit=args.get("unit", ""),
-                    )
-                    try:
-                        watch_id = self._watch_manager.add(watch)
-                    except ValueError as exc:
-                        return f"Error: {exc}"
-                    return f"Watch created: {watch_id}"
-                elif action == "remove":
-                    watch_id = args.get("watch_id", "")
-                    if not watch_id:
-                        return "Missing required parameter: watch_id"
-                    removed = self._watch_manager.remove(watch_id)
-                    if removed:
-                        return f"Watch {watch_id} removed."
-                    return f"Watch {watch_id} not found."
-                return f"Unknown watch action: {action}"
-
-            elif name == "save_memory":
-                if not self._memory_store:
-                    return "Memory store not configured."
-                category = args["category"]
-                key = args.get("key", "")
-                # Resolve device key for device category
-                if category == "device" and key:
-                    try:
-                        resolved = self._device_manager.resolve_device(key)
-                        if isinstance(resolved, str):
-                            key = resolved
-                    except (KeyError, ValueError):
-                        pass  # allow saving for unknown devices
-                return self._memory_store.save(category, key, args["content"])
-
-            elif name == "read_memory":
-                if not self._memory_store:
-                    return "Memory store not configured."
-                category = args["category"]
-                key = args.get("key")
-                # Resolve device key for device category
-                if category == "device" and key:
-                    try:
-                        resolved = self._device_manager.resolve_device(key)
-                        if isinstance(resolved, str):
-                            key = resolved
-                    except (KeyError, ValueError):
-                        pass  # allow reading for unknown devices
-                return self._memory_store.read(category, key)
+    # ------------------------------------------------------------------
+    # Built-in tool handlers (see _tool_handlers)
+    # ------------------------------------------------------------------
+
+    async def _tool_run_command(self, args: dict[str, Any]) -> str:
+        """Run an operational command on a device."""
+        result = await self._device_manager.run_command(
+            args["device"], args["command"],
+        )
+        if result.success:
+            return result.output or "(no output)"
+        return f"Error: {result.error}"
+
+    async def _tool_get_config(self, args: dict[str, Any]) -> str:
+        """Return device configuration, optionally one section."""
+        return await self._device_manager.get_config(
+            args["device"],
+            section=args.get("section"),
+            format=args.get("format", "text"),
+        )
+
+    async def _tool_get_device_facts(self, args: dict[str, Any]) -> str:
+        """Return device facts as JSON."""
+        facts = await self._device_manager.get_facts(args["device"])
+        return _json_dumps(facts)
 
-            elif name == "profile_device":
-                if not self._memory_store:
-                    return "Memory store not configured."
-                return await self.profile_device(args["device"])
+    async def _tool_list_devices(self, args: dict[str, Any]) -> str:
+        """List inventory devices and their connection status."""
+        devices = self._device_manager.list_devices(
+            category=args.get("category"),
+        )
+        result = []
+        for d in devices:
+            entry: dict = {
+                "name": d.name, "host": d.host,
+                "device_key": d.device_key,
+                "status": d.status.value,
+                "model": d.model, "version": d.version,
+            }
+            if d.category:
+                entry["category"] = d.category
+            if d.error:
+                entry["error"] = d.error
+            result.append(entry)
+        return _json_dumps(result)
+
+    async def _tool_get_findings(self, args: dict[str, Any]) -> str:
+        """Return active findings, optionally filtered."""
+        device = args.get("device")
+        if device:
+            try:
+                device = self._device_manager.resolve_device(device)
+            except (KeyError, ValueError) as exc:
+                return f"Error: {exc}"
+        severity = None
+        if "severity" in args:
+            severity = SEVERITY_BY_NAME.get(args["severity"])
+            if severity is None:
+                return f"Error: unknown severity {args['severity']!r}"
+        findings = self._findings.get_active(
+            device=device, severity=severity, category=args.get("category"),
+        )
+        return _json_dumps([f.to_dict() for f in findings])
 
-            elif name == "run_shell":
-                command = args["command"]
-                reason = args.get("reason", "")
+    async def _tool_run_health_check(self, args: dict[str, Any]) -> str:
+        """Run a check category now and return its findings."""
+        await self._run_check(
+            args["category"], args["device"],
+            _user_triggered=True,
+        )
+        findings = self._findings.get_active(
+            device=args["device"], category=args["category"],
+        )
+        if findings:
+            return _json_dumps([f.to_dict() for f in findings])
+        return "Health check completed. No issues found."
 
-                blocked = self._is_shell_blocked(command)
-                if blocked:
-                    return blocked
+    async def _tool_get_metrics(self, args: dict[str, Any]) -> str:
+        """List metric names or return a metric's recent points."""
+        if not self._metrics_store:
+            return "Metrics store not configured."
+        device = args["device"]
+        metric = args.get("metric")
+        if not metric:
+            names = await self._metrics_store.list_metrics(device)
+            if not names:
+                return "No metrics recorded for this device yet."
+            return _json_dumps(names)
+        since = args.get("since_hours", 24)
+        points = await self._metrics_store.query(
+            device, metric, since_hours=since,
+        )
+        if not points:
+            return f"No data for metric '{metric}' in the last {since}h."
+        return _json_dumps([p.to_dict() for p in points])
+
+    async def _tool_compare_config(self, args: dict[str, Any]) -> str:
+        """Diff the running config against a rollback."""
+        rollback = args.get("rollback", 1)
+        result = await self._device_manager.run_command(
+            args["device"],
+            f"show configuration | compare rollback {rollback}",
+        )
+        return result.output if result.success else f"Error: {result.error}"
+
+    async def _tool_manage_heartbeat(self, args: dict[str, Any]) -> str:
+        """List, add, remove or replace heartbeat instructions."""
+        if not self._heartbeat_manager:
+            return "Heartbeat not configured."
+        action = args["action"]
+        if action == "list":
+            return self._heartbeat_manager.list_instructions()
+        elif action == "add":
+            return self._heartbeat_manager.add_instruction(
+                args["instruction"],
+            )
+        elif action == "remove":
+            return self._heartbeat_manager.remove_instruction(
+                args["index"],
+            )
+        elif action == "replace":
+            return self._heartbeat_manager.replace_instructions(
+                args["instruction"],
+            )
+        return f"Unknown heartbeat action: {action}"
+
+    async def _tool_manage_watches(self, args: dict[str, Any]) -> str:
+        """List, add or remove metric watches."""
+        if not self._watch_manager:
+            return "Watch manager not configured."
+        action = args["action"]
+        if action == "list":
+            watches = self._watch_manager.list_watches()
+            if not watches:
+                return "No active watches."
+            return _json_dumps([
+                {"id": w.id, "device": w.device,
+                 "command": w.command, "metric_name": w.metric_name,
+                 "interval": w.interval, "parse_pattern": w.parse_pattern,
+                 "unit": w.unit}
+                for w in watches
+            ])
+        elif action == "add":
+            for field in ("device", "command", "metric_name",
+                          "parse_pattern"):
+                if field not in args:
+                    return f"Missing required parameter: {field}"
+            # Resolve device for watch add
+            err = self._resolve_device_arg(args)
+            if err:
+                return f"Error: {err}"
+            watch = Watch(
+                id="",
+                device=args["device"],
+                command=args["command"],
+                metric_name=args["metric_name"],
+                parse_pattern=args["parse_pattern"],
+                interval=args.get("interval", 60),
+                unit=args.get("unit", ""),
+            )
+            try:
+                watch_id = self._watch_manager.add(watch)
+            except ValueError as exc:
+                return f"Error: {exc}"
+            return f"Watch created: {watch_id}"
+        elif action == "remove":
+            watch_id = args.get("watch_id", "")
+            if not watch_id:
+                return "Missing required parameter: watch_id"
+            removed = self._watch_manager.remove(watch_id)
+            if removed:
+                return f"Watch {watch_id} removed."
+            return f"Watch {watch_id} not found."
+        return f"Unknown watch action: {action}"
+
+    async def _tool_save_memory(self, args: dict[str, Any]) -> str:
+        """Save an entry to persistent memory."""
+        if not self._memory_store:
+            return "Memory store not configured."
+        category = args["category"]
+        key = args.get("key", "")
+        # Resolve device key for device category
+        if category == "device" and key:
+            try:
+                resolved = self._device_manager.resolve_device(key)
+                if isinstance(resolved, str):
+                    key = resolved
+            except (KeyError, ValueError):
+                pass  # allow saving for unknown devices
+        return self._memory_store.save(category, key, args["content"])
+
+    async def _tool_read_memory(self, args: dict[str, Any]) -> str:
+        """Read an entry (or a listing) from persistent memory."""
+        if not self._memory_store:
+            return "Memory store not configured."
+        category = args["category"]
+        key = args.get("key")
+        # Resolve device key for device category
+        if category == "device" and key:
+            try:
+                resolved = self._device_manager.resolve_device(key)
+                if isinstance(resolved, str):
+                    key = resolved
+            except (KeyError, ValueError):
+                pass  # allow reading for unknown devices
+        return self._memory_store.read(category, key)
+
+    async def _tool_profile_device(self, args: dict[str, Any]) -> str:
+        """Profile a device and save the result to memory."""
+        if not self._memory_store:
+            return "Memory store not configured."
+        return await self.profile_device(args["device"])
 
-                if not self._approval_callback:
-                    return "Shell commands require an interactive session."
+    async def _tool_run_shell(self, args: dict[str, Any]) -> str:
+        """Run an approved shell command on the operator's machine."""
+        command = args["command"]
+        reason = args.get("reason", "")
 
-                approved = await self._approval_callback(command, reason)
-                if not approved:
-                    return "Command denied by user."
+        blocked = self._is_shell_blocked(command)
+        if blocked:
+            return blocked
 
-                try:
-                    proc = await asyncio.create_subprocess_shell(
-                        command,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                    )
-                    stdout, stderr = await asyncio.wait_for(
-                        proc.communicate(), timeout=SHELL_COMMAND_TIMEOUT,
-                    )
-                except asyncio.TimeoutError:
-                    return "Command timed out after 60 seconds."
+        if not self._approval_callback:
+            return "Shell commands require an interactive session."
 
-                output = ""
-                if stdout:
-                    output += stdout.decode(errors="replace")
-                if stderr:
-                    output += stderr.decode(errors="replace")
+        # One approval prompt at a time, even for concurrent tool calls
+        async with self._approval_lock:
+            approved = await self._approval_callback(command, reason)
+        if not approved:
+            return "Command denied by user."
 
-                # Truncate to 50 KB
-                if len(output) > 50_000:
-                    output = output[:50_000] + "\n... (output truncated)"
+        try:
+            proc = await asyncio.create_subprocess_shell(
+                command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(), timeout=SHELL_COMMAND_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            return "Command timed out after 60 seconds."
 
-                return output or "(no output)"
+        output = ""
+        if stdout:
+            output += stdout.decode(errors="replace")
+        if stderr:
+            output += stderr.decode(errors="replace")
 
-            elif self._mcp_manager and self._mcp_manager.has_tool(name):
-                return await self._mcp_manager.call_tool(name, args)
+        # Truncate to 50 KB
+        if len(output) > 50_000:
+            output = output[:50_000] + "\n... (output truncated)"
 
-            else:
-                return f"Unknown tool: {name}"
+        return output or "(no output)"
 
-        except Exception as exc:
-            logger.error("Tool execution error (%s): %s", name, exc, exc_info=True)
-            return f"Tool error: {type(exc).__name__}: {exc}"
+    async def _parse_findings(self, analysis: str) -> list[dict]:
+        """Extract the findings array, off the event loop for large replies."""
+        if len(analysis) > PARSE_OFFLOAD_THRESHOLD:
+            return await asyncio.to_thread(self._extract_json_array, analysis)
+        return self._extract_json_array(analysis)
 
     @staticmethod
     def _extract_json_array(text: str) -> list[dict]:
         """Extract a JSON array from LLM response text."""
         # Try to find JSON array in the response
         text = text.strip()
+        if text == "[]":
+            # The usual all-clear reply
+            return []
 
-        # Direct parse
-        try:
-            result = json.loads(text)
-            if isinstance(result, list):
-                return result
-        except json.JSONDecodeError:
-            pass
+        # Fast path: outermost brackets — covers a bare array and a single
+        # fenced block without running any regex
+        start = text.find("[")
+        end = text.rfind("]")
+        if 0 <= start < end:
+            try:
+                result = _json_loads(text[start:end + 1])
+                if isinstance(result, list):
+                    return result
+            except json.JSONDecodeError:
+                pass
+
+        # Second fast path: the first fenced block, when prose around it
+        # holds stray brackets
+        fence = text.find("```")
+        if fence != -1:
+            close = text.find("```", fence + 3)
+            if close != -1:
+                inner = text[fence + 3:close]
+                newline = inner.find("\n")
+                if newline != -1:
+                    inner = inner[newline + 1:]  # drop the info string
+                inner = inner.strip()
+                if inner.startswith("["):
+                    try:
+                        result = _json_loads(inner)
+                        if isinstance(result, list):
+                            return result
+                    except json.JSONDecodeError:
+                        pass
 
         # Find JSON array within text (e.g., surrounded by markdown code blocks)
-        import re
-        patterns = [
-            r'```json\s*(\[.*?\])\s*```',
-            r'```\s*(\[.*?\])\s*```',
-            r'(\[[\s\S]*?\])',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.DOTALL)
+        for pattern in _JSON_ARRAY_PATTERNS:
+            match = pattern.search(text)
             if match:
                 try:
-                    result = json.loads(match.group(1))
+                    result = _json_loads(match.group(1))
                     if isinstance(result, list):
                         return result
                 except json.JSONDecodeError:
                     continue
 
+        # Last resort: each balanced [...] span in turn, all found by one
+        # linear bracket scan rather than a backtracking regex
+        for start, end in _bracket_spans(text):
+            try:
+                result = _json_loads(text[start:end + 1])
+                if isinstance(result, list):
+                    return result
+            except json.JSONDecodeError:
+                pass
+
         return []
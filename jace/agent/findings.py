@@ -5,7 +5,10 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
-from dataclasses import asdict, dataclass, field
+import sys
+from collections.abc import AsyncIterator
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
@@ -14,6 +17,37 @@ import aiosqlite
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+def _dump_raw_data(raw_data: dict) -> bytes:
+    """Serialize ``raw_data`` to UTF-8 JSON bytes, via orjson when installed.
+
+    Bytes are bound as a BLOB, so nothing is decoded only to be
+    re-encoded by SQLite.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(raw_data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # let the stdlib encoder accept or reject it
+    return json.dumps(raw_data).encode()
+
+
+def _load_raw_data(data: bytes | str | None) -> dict:
+    """Parse a stored ``raw_data`` column (NULL/empty means no data).
+
+    Rows written before the column held BLOBs come back as ``str``.
+    """
+    if not data:
+        return {}
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class Severity(str, Enum):
     CRITICAL = "critical"
@@ -21,7 +55,14 @@ class Severity(str, Enum):
     INFO = "info"
 
 
-@dataclass
+# Plain dict lookups instead of Severity(value) / per-call rank tables
+SEVERITY_BY_NAME = {s.value: s for s in Severity}
+
+# Lower rank is more severe
+SEVERITY_RANK = {Severity.CRITICAL: 0, Severity.WARNING: 1, Severity.INFO: 2}
+
+
+@dataclass(slots=True)
 class Finding:
     id: str
     device: str
@@ -36,15 +77,27 @@ class Finding:
     raw_data: dict = field(default_factory=dict)
 
     def to_dict(self) -> dict:
-        d = asdict(self)
-        d["severity"] = self.severity.value
-        return d
+        return {
+            "id": self.id,
+            "device": self.device,
+            "severity": self.severity.value,
+            "category": self.category,
+            "title": self.title,
+            "detail": self.detail,
+            "recommendation": self.recommendation,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "resolved": self.resolved,
+            "raw_data": dict(self.raw_data),
+        }
 
 
 def _generate_finding_id(device: str, category: str, title: str) -> str:
     """Generate a deterministic ID for deduplication."""
     key = f"{device}:{category}:{title}"
-    return hashlib.sha256(key.encode()).hexdigest()[:16]
+    # Non-cryptographic dedup key: an 8-byte BLAKE2b digest gives the same
+    # 16 hex chars as the old truncated SHA-256 for less work
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
 
 
 class FindingsTracker:
@@ -54,11 +107,19 @@ class FindingsTracker:
         self._storage_path = storage_path
         self._db_path = storage_path / "findings.db"
         self._active: dict[str, Finding] = {}
+        # Secondary indexes over _active, keyed by finding id
+        self._by_device: dict[str, dict[str, Finding]] = {}
+        self._by_severity: dict[Severity, dict[str, Finding]] = {}
         self._db: aiosqlite.Connection | None = None
 
     async def initialize(self) -> None:
         self._storage_path.mkdir(parents=True, exist_ok=True)
         self._db = await aiosqlite.connect(str(self._db_path))
+        # WAL + NORMAL: commits append to the log instead of fsyncing the
+        # main database file, and readers never block the writer.
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._db.execute("PRAGMA temp_store=MEMORY")
         await self._db.execute("""
             CREATE TABLE IF NOT EXISTS findings (
                 id TEXT PRIMARY KEY,
@@ -71,21 +132,65 @@ class FindingsTracker:
                 first_seen TEXT NOT NULL,
                 last_seen TEXT NOT NULL,
                 resolved INTEGER DEFAULT 0,
-                raw_data TEXT
+                raw_data BLOB
             )
         """)
+        # get_history filters by device (optional) and orders by last_seen;
+        # the partial index covers the startup load of active findings.
+        await self._db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_findings_device_last_seen
+                ON findings (device, last_seen)
+        """)
+        await self._db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_findings_last_seen
+                ON findings (last_seen)
+        """)
+        await self._db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_findings_unresolved
+                ON findings (resolved) WHERE resolved = 0
+        """)
         await self._db.commit()
 
-        # Load active (unresolved) findings into memory
+        # Load active (unresolved) findings into memory — one fetch from the
+        # database thread, then build everything in plain loops
         async with self._db.execute(
             "SELECT * FROM findings WHERE resolved = 0"
         ) as cursor:
-            async for row in cursor:
-                finding = self._row_to_finding(row)
-                self._active[finding.id] = finding
+            rows = await cursor.fetchall()
+        loaded = [self._row_to_finding(row) for row in rows]
+        self._active.update((finding.id, finding) for finding in loaded)
+        for finding in loaded:
+            self._index(finding)
+        await self._rekey_legacy_ids()
 
         logger.info("Loaded %d active findings", len(self._active))
 
+    async def _rekey_legacy_ids(self) -> None:
+        """Move active findings stored under an older id scheme to the
+        current one, so later reports still deduplicate against them."""
+        stale = [
+            (finding, new_id) for finding in self._active.values()
+            if (new_id := _generate_finding_id(
+                finding.device, finding.category, finding.title,
+            )) != finding.id
+        ]
+        if not stale:
+            return
+        for finding, new_id in stale:
+            self._unindex(finding)
+            del self._active[finding.id]
+        await self._db.executemany(
+            "UPDATE OR REPLACE findings SET id = ? WHERE id = ?",
+            [(new_id, finding.id) for finding, new_id in stale],
+        )
+        await self._db.commit()
+        for finding, new_id in stale:
+            finding.id = new_id
+            self._active[new_id] = finding
+            self._index(finding)
+        logger.info("Re-keyed %d finding(s) to the current id scheme",
+                    len(stale))
+
     async def close(self) -> None:
         if self._db:
             await self._db.close()
@@ -98,27 +203,54 @@ class FindingsTracker:
 
         Returns (finding, is_new) tuple.
         """
-        finding_id = _generate_finding_id(device, category, title)
+        finding, is_new = self._upsert(
+            device, severity, category, title, detail, recommendation,
+            raw_data, now=datetime.now().isoformat(),
+        )
+        await self._persist(finding)
+        return finding, is_new
+
+    async def add_or_update_many(
+        self, records: list[dict],
+    ) -> list[tuple[Finding, bool]]:
+        """Apply several ``add_or_update`` calls with one write and commit.
+
+        Each record holds ``add_or_update``'s keyword arguments.  Returns
+        (finding, is_new) tuples in record order.
+        """
         now = datetime.now().isoformat()
+        results = [self._upsert(now=now, **record) for record in records]
+        await self._persist_many([finding for finding, _ in results])
+        return results
+
+    def _upsert(self, device: str, severity: Severity, category: str,
+                title: str, detail: str, recommendation: str,
+                raw_data: dict | None = None, *,
+                now: str) -> tuple[Finding, bool]:
+        """Apply an add/update to the in-memory state (not persisted)."""
+        finding_id = _generate_finding_id(device, category, title)
 
         if finding_id in self._active:
             # Update existing finding
             existing = self._active[finding_id]
             existing.last_seen = now
             existing.detail = detail
-            existing.severity = severity
+            if existing.severity != severity:
+                self._by_severity[existing.severity].pop(finding_id, None)
+                existing.severity = severity
+                self._by_severity.setdefault(severity, {})[finding_id] = existing
             existing.recommendation = recommendation
             if raw_data:
                 existing.raw_data = raw_data
-            await self._persist(existing)
             return existing, False
 
-        # New finding
+        # New finding — device/category repeat across many findings, so
+        # share one string object per distinct value
         finding = Finding(
             id=finding_id,
-            device=device,
+            device=sys.intern(device),
             severity=severity,
-            category=category,
+            category=sys.intern(category),
             title=title,
             detail=detail,
             recommendation=recommendation,
@@ -127,43 +259,68 @@ class FindingsTracker:
             raw_data=raw_data or {},
         )
         self._active[finding_id] = finding
-        await self._persist(finding)
+        self._index(finding)
         return finding, True
 
     async def resolve_missing(self, device: str, category: str,
-                              current_titles: set[str]) -> list[Finding]:
-        """Mark findings as resolved if they weren't reported this cycle."""
-        resolved = []
-        for finding in list(self._active.values()):
-            if (finding.device == device and finding.category == category
-                    and finding.title not in current_titles):
-                finding.resolved = True
-                finding.last_seen = datetime.now().isoformat()
-                await self._persist(finding)
-                del self._active[finding.id]
-                resolved.append(finding)
+                              current_titles: AbstractSet[str]) -> list[Finding]:
+        """Mark findings as resolved if they weren't reported this cycle.
+
+        All resolutions are written in one batch with a single commit.
+        """
+        resolved = [
+            finding for finding in self._by_device.get(device, {}).values()
+            if finding.category == category
+            and finding.title not in current_titles
+        ]
+        if not resolved:
+            return resolved
+        now = datetime.now().isoformat()
+        for finding in resolved:
+            finding.resolved = True
+            finding.last_seen = now
+            del self._active[finding.id]
+            self._unindex(finding)
+        await self._persist_many(resolved)
         return resolved
 
     def get_active(self, device: str | None = None,
                    severity: Severity | None = None,
                    category: str | None = None) -> list[Finding]:
-        findings = list(self._active.values())
+        # Start from the narrowest index, then filter what remains
         if device:
-            findings = [f for f in findings if f.device == device]
-        if severity:
-            findings = [f for f in findings if f.severity == severity]
+            findings = list(self._by_device.get(device, {}).values())
+            if severity:
+                findings = [f for f in findings if f.severity == severity]
+        elif severity:
+            findings = list(self._by_severity.get(severity, {}).values())
+        else:
+            findings = list(self._active.values())
         if category:
             findings = [f for f in findings if f.category == category]
         return sorted(findings, key=lambda f: (
-            {"critical": 0, "warning": 1, "info": 2}[f.severity.value],
-            f.last_seen,
+            SEVERITY_RANK[f.severity], f.last_seen,
         ))
 
     async def get_history(self, device: str | None = None,
                           include_resolved: bool = True,
                           limit: int = 100) -> list[Finding]:
+        return [
+            finding async for finding in self.iter_history(
+                device=device, include_resolved=include_resolved, limit=limit,
+            )
+        ]
+
+    async def iter_history(self, device: str | None = None,
+                           include_resolved: bool = True,
+                           limit: int = 100) -> AsyncIterator[Finding]:
+        """Yield findings newest first, one row at a time.
+
+        Use this over ``get_history`` when the caller transforms each
+        finding anyway, so the full list of Findings is never built.
+        """
         if not self._db:
-            return []
+            return
         query = "SELECT * FROM findings"
         params: list = []
         conditions = []
@@ -178,7 +335,8 @@ class FindingsTracker:
         params.append(limit)
 
         async with self._db.execute(query, params) as cursor:
-            return [self._row_to_finding(row) async for row in cursor]
+            async for row in cursor:
+                yield self._row_to_finding(row)
 
     @property
     def active_count(self) -> int:
@@ -186,31 +344,49 @@ class FindingsTracker:
 
     @property
     def critical_count(self) -> int:
-        return sum(1 for f in self._active.values()
-                   if f.severity == Severity.CRITICAL)
+        return len(self._by_severity.get(Severity.CRITICAL, {}))
+
+    def _index(self, finding: Finding) -> None:
+        self._by_device.setdefault(finding.device, {})[finding.id] = finding
+        self._by_severity.setdefault(finding.severity, {})[finding.id] = finding
+
+    def _unindex(self, finding: Finding) -> None:
+        by_device = self._by_device.get(finding.device)
+        if by_device is not None:
+            by_device.pop(finding.id, None)
+            if not by_device:
+                del self._by_device[finding.device]
+        self._by_severity.get(finding.severity, {}).pop(finding.id, None)
 
     async def _persist(self, finding: Finding) -> None:
-        if not self._db:
+        await self._persist_many([finding])
+
+    async def _persist_many(self, findings: list[Finding]) -> None:
+        if not self._db or not findings:
             return
-        await self._db.execute("""
+        await self._db.executemany("""
             INSERT OR REPLACE INTO findings
             (id, device, severity, category, title, detail, recommendation,
              first_seen, last_seen, resolved, raw_data)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            finding.id, finding.device, finding.severity.value,
-            finding.category, finding.title, finding.detail,
-            finding.recommendation, finding.first_seen, finding.last_seen,
-            int(finding.resolved), json.dumps(finding.raw_data),
-        ))
+        """, [
+            (
+                f.id, f.device, f.severity.value,
+                f.category, f.title, f.detail,
+                f.recommendation, f.first_seen, f.last_seen,
+                int(f.resolved), _dump_raw_data(f.raw_data),
+            )
+            for f in findings
+        ])
         await self._db.commit()
 
     @staticmethod
     def _row_to_finding(row: tuple) -> Finding:
         return Finding(
-            id=row[0], device=row[1], severity=Severity(row[2]),
-            category=row[3], title=row[4], detail=row[5] or "",
+            id=row[0], device=sys.intern(row[1]),
+            severity=SEVERITY_BY_NAME[row[2]], category=sys.intern(row[3]),
+            title=row[4], detail=row[5] or "",
             recommendation=row[6] or "", first_seen=row[7],
             last_seen=row[8], resolved=bool(row[9]),
-            raw_data=json.loads(row[10]) if row[10] else {},
+            raw_data=_load_raw_data(row[10]),
         )
@@ -15,6 +15,8 @@ class HeartbeatManager:
         self._path = path.resolve()
         self._cached_content: str = ""
         self._cached_mtime: float = 0.0
+        # Parsed instruction lines for _cached_content; reset when it changes
+        self._cached_lines: list[str] | None = None
 
     @property
     def path(self) -> Path:
@@ -22,36 +24,53 @@ class HeartbeatManager:
 
     def load(self) -> str:
         """Read file and update cached mtime. Returns content or empty string."""
-        if not self._path.exists():
-            self._cached_content = ""
-            self._cached_mtime = 0.0
-            return ""
-        self._cached_content = self._path.read_text(encoding="utf-8")
-        self._cached_mtime = self._path.stat().st_mtime
+        mtime = self._stat_mtime()
+        # mtime is taken before reading, so a write racing the read shows up
+        # as a change on the next check rather than being missed
+        self._cached_content = (
+            self._path.read_text(encoding="utf-8") if mtime else ""
+        )
+        self._cached_mtime = mtime
+        self._cached_lines = None
         return self._cached_content
 
     def has_changed(self) -> bool:
         """Check if the file was modified since last load."""
-        if not self._path.exists():
-            return self._cached_mtime != 0.0
-        return self._path.stat().st_mtime != self._cached_mtime
+        return self._stat_mtime() != self._cached_mtime
 
     def get_instructions(self) -> str:
         """Return cached content, re-reading if file changed on disk."""
         if self.has_changed():
             logger.info("Heartbeat file changed on disk, reloading")
             self.load()
-        elif not self._cached_content:
-            self.load()
         return self._cached_content
 
+    def _stat_mtime(self) -> float:
+        """Return the file's mtime, or 0.0 if it does not exist (one stat)."""
+        try:
+            return self._path.stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
     def _get_lines(self) -> list[str]:
-        """Parse instruction lines (non-empty, non-comment lines)."""
-        content = self.get_instructions()
-        return [
-            line for line in content.splitlines()
-            if line.strip() and not line.strip().startswith("#")
-        ]
+        """Parse instruction lines (non-empty, non-comment lines).
+
+        The parsed list is cached per file version; treat it as read-only.
+        """
+        self.get_instructions()
+        return self._current_lines()
+
+    def _current_lines(self) -> list[str]:
+        """Instruction lines of the cached content, without checking disk."""
+        if self._cached_lines is None:
+            self._cached_lines = [
+                line for line in self._cached_content.splitlines()
+                if (stripped := line.strip()) and not stripped.startswith("#")
+            ]
+        return self._cached_lines
+
+    # Mutators check the file once up front (picking up external edits),
+    # then work on the cached content: one write and no re-read per call.
 
     def add_instruction(self, instruction: str) -> str:
         """Append an instruction line and write file. Returns updated content."""
@@ -63,34 +82,36 @@ class HeartbeatManager:
             content += "\n"
         content += line + "\n"
         self._write(content)
-        return self.list_instructions()
+        return self._format_listing(self._current_lines())
 
     def remove_instruction(self, index: int) -> str:
         """Remove instruction by 1-based index. Returns updated content."""
         lines = self._get_lines()
         if index < 1 or index > len(lines):
             return f"Invalid index {index}. There are {len(lines)} instruction(s)."
-        target = lines[index - 1]
+        target = lines[index - 1].strip()
         # Remove the first occurrence of the target line from the full content
-        all_lines = self.get_instructions().splitlines(keepends=True)
         new_lines: list[str] = []
         removed = False
-        for raw in all_lines:
-            if not removed and raw.strip() == target.strip():
+        for raw in self._cached_content.splitlines(keepends=True):
+            if not removed and raw.strip() == target:
                 removed = True
                 continue
             new_lines.append(raw)
         self._write("".join(new_lines))
-        return self.list_instructions()
+        return self._format_listing(self._current_lines())
 
     def replace_instructions(self, content: str) -> str:
         """Overwrite file with new content. Returns updated content."""
         self._write(content)
-        return self.list_instructions()
+        return self._format_listing(self._current_lines())
 
     def list_instructions(self) -> str:
         """Return numbered list of current instructions."""
-        lines = self._get_lines()
+        return self._format_listing(self._get_lines())
+
+    @staticmethod
+    def _format_listing(lines: list[str]) -> str:
         if not lines:
             return "No heartbeat instructions configured."
         parts: list[str] = []
@@ -106,3 +127,4 @@ class HeartbeatManager:
         self._path.write_text(content, encoding="utf-8")
         self._cached_content = content
         self._cached_mtime = self._path.stat().st_mtime
+        self._cached_lines = None
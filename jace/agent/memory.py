@@ -2,12 +2,22 @@
 
 from __future__ import annotations
 
+import functools
+import heapq
 import logging
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Characters not allowed in memory file names
+_UNSAFE_NAME_CHARS = re.compile(r"[^\w\-.]")
+
+# Overlaps the stat/read syscalls when building the memory context
+_executor = ThreadPoolExecutor(max_workers=4)
+
 
 class MemoryStore:
     """Manages persistent markdown memory files under a base directory.
@@ -29,8 +39,21 @@ class MemoryStore:
         self._base = base_path / "memory"
         self._max_file_size = max_file_size
         self._max_total_size = max_total_size
-        # mtime cache: path → (mtime, content)
-        self._cache: dict[Path, tuple[float, str]] = {}
+        # mtime cache: path → (st_mtime_ns, content)
+        self._cache: dict[Path, tuple[int, str]] = {}
+        # device key → (file path, heading); incident slug → file path.
+        # Pure functions of the key, so entries never need invalidating.
+        self._device_paths: dict[str, tuple[Path, str]] = {}
+        self._incident_paths: dict[str, Path] = {}
+        self._version = 0
+        # Last assembled memory context, keyed by (version, paths, mtimes)
+        self._ctx_key: tuple | None = None
+        self._ctx_value = ""
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every write made through this store."""
+        return self._version
 
     def initialize(self) -> None:
         """Create directory structure."""
@@ -48,21 +71,37 @@ class MemoryStore:
         ``devices/<category>/<device>.md``.  Bare names produce the flat
         path: ``devices/<name>.md``.
         """
-        if "/" in name:
-            category, bare = name.split("/", 1)
-            return (
-                self._base / "devices"
-                / self._sanitize(category)
-                / f"{self._sanitize(bare)}.md"
-            )
-        return self._base / "devices" / f"{self._sanitize(name)}.md"
+        return self._device_entry(name)[0]
 
     def _device_heading(self, name: str) -> str:
         """Return the heading for a device memory file."""
-        if "/" in name:
-            _, bare = name.split("/", 1)
-            return f"# Device: {bare}"
-        return f"# Device: {name}"
+        return self._device_entry(name)[1]
+
+    def _device_entry(self, name: str) -> tuple[Path, str]:
+        """Return (path, heading) for a device key, computed once per key."""
+        entry = self._device_paths.get(name)
+        if entry is None:
+            if "/" in name:
+                category, bare = name.split("/", 1)
+                path = (
+                    self._base / "devices"
+                    / self._sanitize(category)
+                    / f"{self._sanitize(bare)}.md"
+                )
+            else:
+                bare = name
+                path = self._base / "devices" / f"{self._sanitize(name)}.md"
+            entry = self._device_paths[name] = (path, f"# Device: {bare}")
+        return entry
+
+    def _incident_path(self, slug: str) -> Path:
+        """Return the path for an incident record, computed once per slug."""
+        path = self._incident_paths.get(slug)
+        if path is None:
+            path = self._incident_paths[slug] = (
+                self._base / "incidents" / f"{self._sanitize(slug)}.md"
+            )
+        return path
 
     # ------------------------------------------------------------------
     # Migration
@@ -87,6 +126,7 @@ class MemoryStore:
                 new_path.parent.mkdir(parents=True, exist_ok=True)
                 legacy_path.rename(new_path)
                 self._cache.pop(legacy_path, None)
+                self._version += 1
                 migrated += 1
                 logger.info("Migrated device memory %s → %s", legacy_path, new_path)
         return migrated
@@ -107,7 +147,7 @@ class MemoryStore:
 
     def save_incident(self, slug: str, content: str) -> None:
         """Save or append to an incident record."""
-        path = self._base / "incidents" / f"{self._sanitize(slug)}.md"
+        path = self._incident_path(slug)
         self._append_or_create(path, content, f"# Incident: {slug}")
 
     # ------------------------------------------------------------------
@@ -125,8 +165,7 @@ class MemoryStore:
 
     def get_incident(self, slug: str) -> str:
         """Return incident content, or empty string."""
-        path = self._base / "incidents" / f"{self._sanitize(slug)}.md"
-        return self._read_cached(path)
+        return self._read_cached(self._incident_path(slug))
 
     # ------------------------------------------------------------------
     # List operations
@@ -139,29 +178,38 @@ class MemoryStore:
         subdirectories and bare names for files directly under
         ``devices/``.
         """
-        devices_dir = self._base / "devices"
-        if not devices_dir.exists():
-            return []
+        # os.scandir reuses readdir's file-type info, so no Path objects or
+        # extra stat calls per entry; one level of nesting, per the layout
         names: list[str] = []
-        for p in devices_dir.rglob("*.md"):
-            rel = p.relative_to(devices_dir)
-            parts = rel.parts
-            if len(parts) == 1:
+        try:
+            with os.scandir(self._base / "devices") as it:
+                entries = list(it)
+        except FileNotFoundError:
+            return []
+        for entry in entries:
+            if entry.name.endswith(".md") and entry.is_file():
                 # Flat file: devices/<name>.md
-                names.append(p.stem)
-            elif len(parts) == 2:
+                names.append(entry.name[:-3])
+            elif entry.is_dir():
                 # Nested: devices/<category>/<name>.md
-                names.append(f"{parts[0]}/{p.stem}")
+                with os.scandir(entry.path) as sub:
+                    names.extend(
+                        f"{entry.name}/{e.name[:-3]}" for e in sub
+                        if e.name.endswith(".md") and e.is_file()
+                    )
         return sorted(names)
 
     def list_incidents(self, limit: int = 10) -> list[str]:
         """Return slugs of most recent incidents (by mtime)."""
-        incidents_dir = self._base / "incidents"
-        if not incidents_dir.exists():
+        try:
+            with os.scandir(self._base / "incidents") as it:
+                dated = [
+                    (entry.stat().st_mtime, entry.name[:-3]) for entry in it
+                    if entry.name.endswith(".md") and entry.is_file()
+                ]
+        except FileNotFoundError:
             return []
-        files = sorted(incidents_dir.glob("*.md"), key=lambda p: p.stat().st_mtime,
-                        reverse=True)
-        return [p.stem for p in files[:limit]]
+        return [slug for _, slug in heapq.nlargest(limit, dated)]
 
     # ------------------------------------------------------------------
     # Context building
@@ -172,45 +220,47 @@ class MemoryStore:
 
         Priority: user prefs → device profiles → recent incidents.
         """
-        parts: list[str] = []
+        # Header and footer live in parts so the block is built by a single
+        # join instead of concatenating around an already-joined body
+        parts: list[str] = ["\n\n--- Persistent Memory ---"]
         budget = self._max_total_size
 
-        # 1. User preferences
-        user_prefs = self.get_user_preferences()
-        if user_prefs:
-            chunk = self._budget_trim(user_prefs)
-            parts.append(chunk)
-            budget -= len(chunk)
-
-        # 2. Device profiles
+        # Read every candidate file up front, concurrently, in priority
+        # order; the budget is applied afterwards in memory
         names = device_names or self.get_all_device_names()
-        for name in names:
-            if budget <= 0:
-                break
-            profile = self.get_device(name)
-            if profile:
-                chunk = self._budget_trim(profile, budget)
-                parts.append(chunk)
-                budget -= len(chunk)
+        paths = [self._base / "user.md"]
+        paths.extend(self._device_path(name) for name in names)
+        paths.extend(self._incident_path(slug) for slug in self.list_incidents(limit=5))
+
+        # Files rarely change between turns: one stat per file decides
+        # whether the previously assembled block is still valid
+        key = (self._version, tuple(paths), tuple(map(self._mtime_ns, paths)))
+        if key == self._ctx_key:
+            return self._ctx_value
+
+        if len(paths) > 1:
+            contents = list(_executor.map(self._read_cached, paths))
+        else:
+            contents = [self._read_cached(paths[0])]
 
-        # 3. Recent incidents
-        for slug in self.list_incidents(limit=5):
-            if budget <= 0:
+        # 1. User preferences (only capped per-file), then 2. device
+        # profiles and 3. recent incidents within the remaining budget
+        for i, text in enumerate(contents):
+            if i and budget <= 0:
                 break
-            incident = self.get_incident(slug)
-            if incident:
-                chunk = self._budget_trim(incident, budget)
+            if text:
+                chunk = self._budget_trim(text, budget if i else None)
                 parts.append(chunk)
                 budget -= len(chunk)
 
-        if not parts:
-            return ""
-
-        return (
-            "\n\n--- Persistent Memory ---\n\n"
-            + "\n\n".join(parts)
-            + "\n\n--- End Memory ---"
-        )
+        if len(parts) == 1:
+            context = ""
+        else:
+            parts.append("--- End Memory ---")
+            context = "\n\n".join(parts)
+        self._ctx_key = key
+        self._ctx_value = context
+        return context
 
     # ------------------------------------------------------------------
     # Generic save/read for tool interface
@@ -256,52 +306,76 @@ class MemoryStore:
     # ------------------------------------------------------------------
 
     def _append_or_create(self, path: Path, content: str, heading: str) -> None:
-        """Append content to file, or create with heading if new."""
+        """Append content to file, or create with heading if new.
+
+        An append that keeps the file under max_file_size writes only the
+        new entry (O_APPEND); the existing text comes from the mtime
+        cache, so it is re-read only after an external edit.
+        """
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        if path.exists():
-            existing = path.read_text(encoding="utf-8")
-            new_content = existing.rstrip("\n") + "\n\n" + content.strip() + "\n"
-        else:
+        existing = self._read_cached(path)
+        if not existing and not path.exists():
             new_content = heading + "\n\n" + content.strip() + "\n"
+            self._truncate_and_write(path, new_content, heading)
+            return
+
+        new_content = existing.rstrip("\n") + "\n\n" + content.strip() + "\n"
+        if (len(new_content) > self._max_file_size
+                or not new_content.startswith(existing)):
+            # Truncation, or trailing blank lines to collapse: rewrite
+            self._truncate_and_write(path, new_content, heading)
+            return
 
-        self._truncate_and_write(path, new_content, heading)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(new_content[len(existing):])
+        self._remember(path, new_content)
 
     def _truncate_and_write(self, path: Path, content: str, heading: str) -> None:
         """Write content, truncating to max_file_size if needed."""
-        if len(content) <= self._max_file_size:
-            path.write_text(content, encoding="utf-8")
-        else:
-            # Keep heading + most recent entries that fit
-            lines = content.split("\n")
-            result = heading + "\n\n"
-            remaining = self._max_file_size - len(result) - 40  # buffer
-            # Take lines from the end until budget exhausted
-            kept: list[str] = []
-            for line in reversed(lines):
-                if remaining - len(line) - 1 < 0:
-                    break
-                kept.append(line)
-                remaining -= len(line) + 1
-            result += "(earlier entries truncated)\n\n"
-            result += "\n".join(reversed(kept))
-            path.write_text(result.rstrip("\n") + "\n", encoding="utf-8")
-
-        # Update cache
-        self._cache[path] = (path.stat().st_mtime, path.read_text(encoding="utf-8"))
+        if len(content) > self._max_file_size:
+            # Keep heading + most recent whole lines that fit: slice the
+            # tail and drop the partial first line (no per-line loop)
+            remaining = self._max_file_size - len(heading) - 2 - 40  # buffer
+            tail = content[-remaining:] if remaining > 0 else ""
+            tail = tail[tail.find("\n") + 1:] if "\n" in tail else ""
+            content = (
+                f"{heading}\n\n(earlier entries truncated)\n\n{tail}"
+            ).rstrip("\n") + "\n"
+        path.write_text(content, encoding="utf-8")
+        self._remember(path, content)
+
+    def _remember(self, path: Path, content: str) -> None:
+        """Cache the content just written to *path* (no read-back)."""
+        self._cache[path] = (os.stat(path).st_mtime_ns, content)
+        self._version += 1
+
+    @staticmethod
+    def _mtime_ns(path: Path) -> int | None:
+        """Return the file's st_mtime_ns, or None if it does not exist."""
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
 
     def _read_cached(self, path: Path) -> str:
-        """Read file with mtime caching."""
-        if not path.exists():
+        """Read file with mtime caching.
+
+        A cache hit costs one ``stat`` (a missing file is the same stat
+        failing); integer ``st_mtime_ns`` avoids float-compare surprises.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
             self._cache.pop(path, None)
             return ""
 
-        mtime = path.stat().st_mtime
         cached = self._cache.get(path)
         if cached and cached[0] == mtime:
             return cached[1]
 
-        content = path.read_text(encoding="utf-8")
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
         self._cache[path] = (mtime, content)
         return content
 
@@ -313,6 +387,11 @@ class MemoryStore:
         return text[:limit - 3] + "..."
 
     @staticmethod
+    @functools.lru_cache(maxsize=2048)
     def _sanitize(name: str) -> str:
-        """Sanitize a name for use as a filename."""
-        return re.sub(r"[^\w\-.]", "_", name)
+        """Sanitize a name for use as a filename.
+
+        Memoized: the same device names and slugs are sanitized on every
+        context build.
+        """
+        return _UNSAFE_NAME_CHARS.sub("_", name)
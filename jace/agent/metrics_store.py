@@ -2,18 +2,112 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import math
+import time
+from array import array
+from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
+from typing import Iterable
 
 import aiosqlite
 
 logger = logging.getLogger(__name__)
 
+# Single-point record() calls are buffered and written together: after at
+# most RECORD_FLUSH_INTERVAL seconds, or at once when RECORD_FLUSH_ROWS
+# points are waiting.  Reads flush first, so they always see every point.
+RECORD_FLUSH_INTERVAL = 0.5
+RECORD_FLUSH_ROWS = 128
 
-@dataclass
+_INSERT_SQL = (
+    "INSERT INTO metrics (device, category, metric, value, unit, ts, tags) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Read statements are module constants so every call passes identical SQL
+# text and hits sqlite3's per-connection prepared-statement cache
+_POINT_COLUMNS = "device, category, metric, value, unit, ts, tags"
+_QUERY_SQL = (
+    f"SELECT {_POINT_COLUMNS} FROM metrics "
+    "WHERE device = ? AND metric = ? AND ts >= ? ORDER BY ts ASC LIMIT ?"
+)
+_LATEST_SQL = (
+    f"SELECT {_POINT_COLUMNS} FROM metrics "
+    "WHERE device = ? AND metric = ? ORDER BY ts DESC LIMIT 1"
+)
+_LIST_METRICS_SQL = (
+    "SELECT DISTINCT metric FROM metrics WHERE device = ? ORDER BY metric"
+)
+
+# Covers every column a point read returns, so range scans are answered
+# from the index B-tree without a lookup into the table per row.  It
+# replaces the narrower (device, metric, ts) index it starts with.
+_CREATE_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_metrics_cover
+        ON metrics (device, metric, ts, value, unit, category, tags)
+"""
+
+# ts is stored as Unix nanoseconds; MetricPoint.ts stays an ISO string
+_CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id       INTEGER PRIMARY KEY AUTOINCREMENT,
+        device   TEXT NOT NULL,
+        category TEXT NOT NULL,
+        metric   TEXT NOT NULL,
+        value    REAL NOT NULL,
+        unit     TEXT NOT NULL DEFAULT '',
+        ts       INTEGER NOT NULL,
+        tags     TEXT NOT NULL DEFAULT '{{}}'
+    )
+"""
+
+_NS_PER_SECOND = 1_000_000_000
+_NS_PER_HOUR = 3600 * _NS_PER_SECOND
+_NS_PER_MS = 1_000_000
+
+# Times a window is re-seeded when writes race its seeding scan
+_SEED_ATTEMPTS = 3
+
+
+def _iso_to_ns(ts: str) -> int:
+    """Convert an ISO timestamp (naive = local time) to Unix nanoseconds.
+
+    Whole seconds go through ``timestamp()`` and microseconds are added as
+    integers, so the result round-trips exactly through :func:`_ns_to_iso`.
+    """
+    dt = datetime.fromisoformat(ts)
+    seconds = int(dt.replace(microsecond=0).timestamp())
+    return seconds * _NS_PER_SECOND + dt.microsecond * 1000
+
+
+def _ns_to_iso(ns: int) -> str:
+    """Convert Unix nanoseconds to a naive local ISO timestamp."""
+    seconds, remainder = divmod(ns, _NS_PER_SECOND)
+    return datetime.fromtimestamp(seconds).replace(
+        microsecond=remainder // 1000,
+    ).isoformat()
+
+
+def _encode_tags(tags: dict) -> str:
+    """JSON-encode a point's tags; most points have none."""
+    return json.dumps(tags) if tags else "{}"
+
+
+def _migrate_ts(ts: str) -> int:
+    """``_iso_to_ns`` for the TEXT → INTEGER migration; unparsable
+    timestamps become 0 and are dropped by the retention cleanup."""
+    try:
+        return _iso_to_ns(ts)
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass(slots=True)
 class MetricPoint:
     device: str
     category: str
@@ -35,6 +129,100 @@ class MetricPoint:
         }
 
 
+class _RollingWindow:
+    """Running mean/variance (Welford) over a time-bounded window of values.
+
+    Points are pushed in timestamp order and evicted from the left with the
+    inverse Welford update, so statistics never require a full pass.  Values
+    live unboxed in an ``array('d')`` consumed from ``head``; the dead prefix
+    is compacted away once it outgrows the live part.
+
+    Inverse updates leave rounding residue behind, so the statistics are
+    recomputed exactly once per window's worth of evictions, and set exactly
+    whenever the window holds a single repeated value (stddev 0).
+    """
+
+    __slots__ = ("since_hours", "limit", "timestamps", "values", "head",
+                 "count", "mean", "m2", "pops", "run")
+
+    def __init__(self, since_hours: int, limit: int) -> None:
+        self.since_hours = since_hours
+        self.limit = limit
+        self.timestamps: deque[int] = deque()
+        self.values = array("d")
+        self.head = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Evictions since the last exact recompute, and how many trailing
+        # values equal the newest one
+        self.pops = 0
+        self.run = 0
+
+    @property
+    def last_ts(self) -> int | None:
+        return self.timestamps[-1] if self.timestamps else None
+
+    def push(self, ts: int, value: float) -> None:
+        self.run = self.run + 1 if self.count and value == self.values[-1] else 1
+        self.timestamps.append(ts)
+        self.values.append(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.count > self.limit:
+            self._pop()
+
+    def evict_before(self, since: int) -> int:
+        """Drop points older than *since*; return how many were evicted."""
+        evicted = 0
+        while self.timestamps and self.timestamps[0] < since:
+            self._pop()
+            evicted += 1
+        return evicted
+
+    def stats(self) -> tuple[int, float, float]:
+        if not self.count:
+            return 0, 0.0, 0.0
+        return self.count, self.mean, math.sqrt(max(self.m2, 0.0) / self.count)
+
+    def _pop(self) -> None:
+        self.timestamps.popleft()
+        value = self.values[self.head]
+        self.head += 1
+        if self.head > self.count:
+            del self.values[:self.head]
+            self.head = 0
+        self.count -= 1
+        if not self.count:
+            self.mean = 0.0
+            self.m2 = 0.0
+            self.pops = self.run = 0
+            return
+        if self.run >= self.count:
+            # Only the repeated newest value is left: exact, no residue
+            self.run = self.count
+            self.mean = self.values[-1]
+            self.m2 = 0.0
+            self.pops = 0
+            return
+        old_mean = self.mean
+        self.mean -= (value - old_mean) / self.count
+        self.m2 -= (value - old_mean) * (value - self.mean)
+        self.pops += 1
+        if self.pops >= self.count:
+            self._resync()
+
+    def _resync(self) -> None:
+        """Recompute mean and m2 exactly from the live values (amortized
+        O(1): at most once per ``count`` evictions)."""
+        live = self.values[self.head:]
+        self.mean = math.fsum(live) / self.count
+        self.m2 = math.fsum((v - self.mean) ** 2 for v in live)
+        self.pops = 0
+
+
 class MetricsStore:
     """Append-only SQLite time-series store for device metrics."""
 
@@ -42,110 +230,357 @@ class MetricsStore:
         self._storage_path = storage_path
         self._db_path = storage_path / "metrics.db"
         self._db: aiosqlite.Connection | None = None
+        # (device, metric) → rolling window, seeded lazily by stats()
+        self._windows: dict[tuple[str, str], _RollingWindow] = {}
+        # (device, metric) → bumped whenever its window contents change
+        self._versions: dict[tuple[str, str], int] = {}
+        # Rows from record() not yet written, and the timer that writes them
+        self._pending: list[tuple] = []
+        # Last (ns, iso) stamp handed to an undated point, see _now()
+        self._last_now: tuple[int, str] = (0, "")
+        self._flush_task: asyncio.Task | None = None
+        # The batch write in progress; it is shielded from its caller's
+        # cancellation because aiosqlite cannot stop a running statement
+        self._write_task: asyncio.Task | None = None
 
     async def initialize(self, retention_days: int = 30) -> None:
         self._storage_path.mkdir(parents=True, exist_ok=True)
         self._db = await aiosqlite.connect(str(self._db_path))
-        await self._db.execute("""
-            CREATE TABLE IF NOT EXISTS metrics (
-                id       INTEGER PRIMARY KEY AUTOINCREMENT,
-                device   TEXT NOT NULL,
-                category TEXT NOT NULL,
-                metric   TEXT NOT NULL,
-                value    REAL NOT NULL,
-                unit     TEXT NOT NULL DEFAULT '',
-                ts       TEXT NOT NULL,
-                tags     TEXT NOT NULL DEFAULT '{}'
-            )
-        """)
-        await self._db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_metrics_device_metric_ts
-                ON metrics (device, metric, ts)
-        """)
+        # Append-only time series: WAL + NORMAL keeps commits to a log
+        # append, and the larger page cache / mmap serve the range scans
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._db.execute("PRAGMA temp_store=MEMORY")
+        await self._db.execute("PRAGMA cache_size=-8192")  # KiB
+        await self._db.execute("PRAGMA mmap_size=134217728")
+        await self._db.execute(_CREATE_TABLE_SQL.format(table="metrics"))
+        await self._migrate_text_timestamps()
+        await self._db.execute(_CREATE_INDEX_SQL)
+        await self._db.execute("DROP INDEX IF EXISTS idx_metrics_device_metric_ts")
         await self._db.commit()
         deleted = await self.cleanup_old(retention_days)
         if deleted:
             logger.info("Cleaned up %d old metric rows", deleted)
 
+    async def _migrate_text_timestamps(self) -> None:
+        """Rewrite a table from before integer timestamps (``ts TEXT``)."""
+        async with self._db.execute("PRAGMA table_info(metrics)") as cursor:
+            column_types = {row[1]: row[2] async for row in cursor}
+        if column_types.get("ts", "").upper() != "TEXT":
+            return
+        logger.info("Migrating metrics timestamps to integer nanoseconds")
+        await self._db.create_function(
+            "jace_ts_ns", 1, _migrate_ts, deterministic=True,
+        )
+        # executescript commits first; the BEGIN/COMMIT keeps the copy,
+        # drop and rename atomic
+        await self._db.executescript(
+            "BEGIN;"
+            + _CREATE_TABLE_SQL.format(table="metrics_migrated") + ";"
+            "INSERT INTO metrics_migrated "
+            "SELECT id, device, category, metric, value, unit, "
+            "jace_ts_ns(ts), tags FROM metrics;"
+            "DROP TABLE metrics;"
+            "ALTER TABLE metrics_migrated RENAME TO metrics;"
+            "COMMIT;"
+        )
+
     async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.wait((self._flush_task,))
+            self._flush_task = None
         if self._db:
-            await self._db.close()
+            try:
+                await self.flush()
+            finally:
+                await self._db.close()
 
     async def record(self, point: MetricPoint) -> None:
+        """Buffer *point* for writing (see ``RECORD_FLUSH_INTERVAL``).
+
+        The point is visible to :meth:`stats` immediately and to the
+        query methods, which flush first, as well.
+        """
         if not self._db:
             return
-        if not point.ts:
-            point.ts = datetime.now().isoformat()
-        await self._db.execute(
-            "INSERT INTO metrics (device, category, metric, value, unit, ts, tags) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        if point.ts:
+            ts = _iso_to_ns(point.ts)
+        else:
+            ts, point.ts = self._now()
+        self._pending.append(
             (point.device, point.category, point.metric, point.value,
-             point.unit, point.ts, json.dumps(point.tags)),
+             point.unit, ts, _encode_tags(point.tags)),
         )
+        self._note_writes((point,), (ts,))
+        if len(self._pending) >= RECORD_FLUSH_ROWS:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """Write buffered ``record()`` points in one batch and commit.
+
+        A write already in progress — possibly left running by a cancelled
+        caller — finishes first.  If the insert fails the rows stay
+        buffered for the next attempt.
+        """
+        if not self._db:
+            return
+        running = self._write_task
+        if running is not None:
+            await asyncio.wait((running,))
+            if self._write_task is running:
+                self._write_task = None
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        task = self._write_task = asyncio.ensure_future(self._write(rows))
+        await asyncio.shield(task)
+        if self._write_task is task:
+            self._write_task = None
+
+    async def _write(self, rows: list[tuple]) -> None:
+        try:
+            await self._db.executemany(_INSERT_SQL, rows)
+        except BaseException:
+            # The insert did not run; a failed commit below must not
+            # re-buffer rows that already sit in the open transaction
+            self._pending[:0] = rows
+            raise
         await self._db.commit()
 
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(RECORD_FLUSH_INTERVAL)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as exc:
+            logger.error("Failed to write %d buffered metric point(s): %s",
+                         len(self._pending), exc)
+
     async def record_many(self, points: list[MetricPoint]) -> None:
         if not self._db or not points:
             return
-        now = datetime.now().isoformat()
+        now: tuple[int, str] | None = None  # only for points without ts
         rows = []
+        stamps = []
+        # Points from one extraction share their tags dict (e.g. a counter
+        # and its delta), so encode each distinct dict once per call
+        encoded_tags: dict[int, str] = {}
         for p in points:
-            if not p.ts:
-                p.ts = now
+            if p.ts:
+                ts = _iso_to_ns(p.ts)
+            else:
+                if now is None:
+                    now = self._now()
+                ts, p.ts = now
+            stamps.append(ts)
+            tags = encoded_tags.get(id(p.tags))
+            if tags is None:
+                tags = encoded_tags[id(p.tags)] = _encode_tags(p.tags)
             rows.append((p.device, p.category, p.metric, p.value,
-                          p.unit, p.ts, json.dumps(p.tags)))
-        await self._db.executemany(
-            "INSERT INTO metrics (device, category, metric, value, unit, ts, tags) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?)",
-            rows,
-        )
-        await self._db.commit()
+                          p.unit, ts, tags))
+        # Feed the windows before awaiting: a seeding scan that runs during
+        # the write then sees the version bump instead of counting the rows
+        # twice (see _collect_stats)
+        self._note_writes(points, stamps)
+        try:
+            await self._db.executemany(_INSERT_SQL, rows)
+            await self._db.commit()
+        except BaseException:
+            # The windows now hold points that never reached the database
+            for p in points:
+                self._windows.pop((p.device, p.metric), None)
+            raise
+
+    def _now(self) -> tuple[int, str]:
+        """Return the current time as ``(ns, iso)`` for an undated point.
+
+        Calls within a millisecond of the last stamp reuse it, so bursts
+        of ``record()`` calls skip the datetime formatting.  A wall clock
+        stepped backwards never reuses the (now future) stamp.
+        """
+        now = time.time_ns()
+        last = self._last_now
+        if 0 <= now - last[0] < _NS_PER_MS:
+            return last
+        last = self._last_now = (now, _ns_to_iso(now))
+        return last
 
     async def query(self, device: str, metric: str,
                     since_hours: int = 24,
                     limit: int = 1000) -> list[MetricPoint]:
         if not self._db:
             return []
-        since = (datetime.now() - timedelta(hours=since_hours)).isoformat()
+        await self.flush()
+        since = time.time_ns() - since_hours * _NS_PER_HOUR
         async with self._db.execute(
-            "SELECT device, category, metric, value, unit, ts, tags "
-            "FROM metrics WHERE device = ? AND metric = ? AND ts >= ? "
-            "ORDER BY ts ASC LIMIT ?",
-            (device, metric, since, limit),
+            _QUERY_SQL, (device, metric, since, limit),
         ) as cursor:
             return [self._row_to_point(row) async for row in cursor]
 
-    async def latest(self, device: str, metric: str) -> MetricPoint | None:
+    async def stats(self, device: str, metric: str,
+                    since_hours: int = 24,
+                    limit: int = 1000) -> tuple[int, float, float]:
+        """Return ``(count, mean, stddev)`` of the most recent *limit* points
+        within the last *since_hours*.
+
+        The first call for a ``(device, metric)`` seeds an in-memory rolling
+        window from SQLite; later writes update it incrementally, so
+        subsequent calls are O(1) apart from evicting expired points.
+        """
+        result = await self.stats_many(
+            device, [metric], since_hours=since_hours, limit=limit,
+        )
+        return result[metric]
+
+    async def stats_many(self, device: str, metrics: list[str],
+                         since_hours: int = 24,
+                         limit: int = 1000) -> dict[str, tuple[int, float, float]]:
+        """Batch form of :meth:`stats` for several metrics on one device.
+
+        All windows that still need seeding are loaded in a single scan.
+        """
+        keys = [(device, m) for m in metrics]
+        stats = await self._collect_stats(keys, since_hours, limit)
+        return dict(zip(metrics, stats))
+
+    async def _collect_stats(
+        self, keys: list[tuple[str, str]], since_hours: int, limit: int,
+    ) -> list[tuple[int, float, float]]:
         if not self._db:
-            return None
+            return [(0, 0.0, 0.0)] * len(keys)
+        since = time.time_ns() - since_hours * _NS_PER_HOUR
+
+        windows: dict[tuple[str, str], _RollingWindow] = {}
+        unseeded: dict[tuple[str, str], _RollingWindow] = {}
+        for key in keys:
+            window = self._windows.get(key)
+            if (window is None or window.since_hours != since_hours
+                    or window.limit != limit):
+                unseeded[key] = _RollingWindow(since_hours, limit)
+            else:
+                windows[key] = window
+        for _ in range(_SEED_ATTEMPTS):
+            if not unseeded:
+                break
+            # A write to a key while its window is seeded may be missed by
+            # the scan (a buffered record()) or seen by it and then pushed
+            # again by _note_writes; either way its version moves, so the
+            # window is seeded again rather than registered
+            before = {key: self._versions.get(key, 0) for key in unseeded}
+            await self.flush()
+            await self._seed(unseeded, since)
+            windows.update(unseeded)
+            raced = {key for key in unseeded
+                     if self._versions.get(key, 0) != before[key]}
+            for key, window in unseeded.items():
+                if key not in raced:
+                    self._windows[key] = window
+            unseeded = {key: _RollingWindow(since_hours, limit) for key in raced}
+        # Windows still racing after the last attempt answer this call from
+        # their scan but stay unregistered, so the next call seeds them
+
+        result: list[tuple[int, float, float]] = []
+        for key in keys:
+            window = windows[key]
+            if window.evict_before(since):
+                self._versions[key] = self._versions.get(key, 0) + 1
+            result.append(window.stats())
+        return result
+
+    async def _seed(self, windows: dict[tuple[str, str], _RollingWindow],
+                    since: int) -> None:
+        """Fill fresh *windows* from the points stored since *since*."""
+        devices = list(dict.fromkeys(d for d, _ in windows))
+        metrics = list(dict.fromkeys(m for _, m in windows))
+        # Callers vary one side, so the cross product rarely over-reads
         async with self._db.execute(
-            "SELECT device, category, metric, value, unit, ts, tags "
-            "FROM metrics WHERE device = ? AND metric = ? "
-            "ORDER BY ts DESC LIMIT 1",
-            (device, metric),
+            "SELECT device, metric, ts, value FROM metrics "
+            f"WHERE device IN ({', '.join('?' * len(devices))}) "
+            f"AND metric IN ({', '.join('?' * len(metrics))}) "
+            "AND ts >= ? ORDER BY ts ASC",
+            (*devices, *metrics, since),
         ) as cursor:
+            # Windows cap themselves at *limit*, keeping the newest points
+            async for device, metric, ts, value in cursor:
+                window = windows.get((device, metric))
+                if window is not None:
+                    window.push(ts, value)
+
+    def version(self, device: str, metric: str) -> int:
+        """Return a counter that changes whenever *metric*'s window changes.
+
+        Callers can cache anything derived from :meth:`stats` and reuse it
+        for as long as the version is unchanged.
+        """
+        return self._versions.get((device, metric), 0)
+
+    async def latest(self, device: str, metric: str) -> MetricPoint | None:
+        if not self._db:
+            return None
+        await self.flush()
+        async with self._db.execute(_LATEST_SQL, (device, metric)) as cursor:
             row = await cursor.fetchone()
             return self._row_to_point(row) if row else None
 
+    async def latest_many(self, device: str,
+                          metrics: list[str]) -> dict[str, MetricPoint]:
+        """Return the most recent point for each of *metrics* in one query.
+
+        Metrics with no recorded points are absent from the result.
+        """
+        if not self._db or not metrics:
+            return {}
+        await self.flush()
+        placeholders = ", ".join("?" * len(metrics))
+        # SQLite fills bare columns from the row that produced MAX(ts)
+        async with self._db.execute(
+            "SELECT device, category, metric, value, unit, MAX(ts), tags "
+            f"FROM metrics WHERE device = ? AND metric IN ({placeholders}) "
+            "GROUP BY metric",
+            (device, *metrics),
+        ) as cursor:
+            return {row[2]: self._row_to_point(row) async for row in cursor}
+
     async def list_metrics(self, device: str) -> list[str]:
         if not self._db:
             return []
-        async with self._db.execute(
-            "SELECT DISTINCT metric FROM metrics WHERE device = ? ORDER BY metric",
-            (device,),
-        ) as cursor:
+        await self.flush()
+        async with self._db.execute(_LIST_METRICS_SQL, (device,)) as cursor:
             return [row[0] async for row in cursor]
 
     async def cleanup_old(self, retention_days: int = 30) -> int:
         if not self._db:
             return 0
-        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+        await self.flush()
+        cutoff = time.time_ns() - retention_days * 24 * _NS_PER_HOUR
         cursor = await self._db.execute(
             "DELETE FROM metrics WHERE ts < ?", (cutoff,),
         )
         await self._db.commit()
         return cursor.rowcount
 
+    def _note_writes(self, points: Iterable[MetricPoint],
+                     stamps: Iterable[int]) -> None:
+        """Bump versions and feed freshly recorded points into seeded windows.
+
+        *stamps* holds each point's timestamp in nanoseconds.
+        """
+        versions = self._versions
+        for p, ts in zip(points, stamps):
+            key = (p.device, p.metric)
+            versions[key] = versions.get(key, 0) + 1
+            window = self._windows.get(key)
+            if window is None:
+                continue
+            # Back-dated points would break timestamp ordering — skip them
+            last_ts = window.last_ts
+            if last_ts is not None and ts < last_ts:
+                continue
+            window.push(ts, p.value)
+
     @staticmethod
     def _row_to_point(row: tuple) -> MetricPoint:
         return MetricPoint(
@@ -154,6 +589,6 @@ class MetricsStore:
             metric=row[2],
             value=row[3],
             unit=row[4],
-            ts=row[5],
+            ts=_ns_to_iso(row[5]),
             tags=json.loads(row[6]) if row[6] else {},
         )
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
 from typing import Callable, Awaitable
 
@@ -14,6 +15,18 @@ logger = logging.getLogger(__name__)
 ScheduleCallback = Callable[[str, str], Awaitable[None]]  # (category, device_name)
 
 
+def stagger_offset(key: str, span: int) -> int:
+    """Return a start offset in ``[0, span)`` derived from *key*.
+
+    Unlike ``hash()``, the result does not depend on ``PYTHONHASHSEED``,
+    so a given key staggers the same way on every restart.
+    """
+    if span <= 0:
+        return 0
+    digest = hashlib.blake2s(key.encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "big") % span
+
+
 class Scheduler:
     """Schedules periodic health checks per category per device."""
 
@@ -32,6 +45,9 @@ class Scheduler:
         self._device_schedules = device_schedules or {}
         self._tasks: list[asyncio.Task] = []
         self._running = False
+        # Set (then replaced) by update_interval to wake sleeping loops so a
+        # new interval applies to the current wait, not the one after it
+        self._interval_changed = asyncio.Event()
 
     def _get_interval(self, category: str, device_name: str) -> int:
         """Return the interval for a category on a device, preferring
@@ -70,7 +86,7 @@ class Scheduler:
                         interval: int, callback: ScheduleCallback) -> None:
         """Run a check category on a schedule."""
         # Initial delay: stagger checks to avoid thundering herd
-        stagger = hash(f"{category}-{device_name}") % min(30, interval)
+        stagger = stagger_offset(f"{category}-{device_name}", min(30, interval))
         await asyncio.sleep(stagger)
 
         while self._running:
@@ -82,8 +98,31 @@ class Scheduler:
             except Exception as exc:
                 logger.error("Scheduled check %s/%s failed: %s",
                              category, device_name, exc)
-            await asyncio.sleep(interval)
+            await self._wait_until_due(category, device_name)
+
+    async def _wait_until_due(self, category: str, device_name: str) -> None:
+        """Sleep until the next run is due, re-reading the interval when
+        ``update_interval`` signals a change."""
+        loop = asyncio.get_running_loop()
+        last_run = loop.time()
+        while True:
+            interval = self._get_interval(category, device_name)
+            remaining = last_run + interval - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(
+                    self._interval_changed.wait(), timeout=remaining,
+                )
+            except asyncio.TimeoutError:
+                return
 
     def update_interval(self, category: str, interval: int) -> None:
-        """Update the global default interval for a category (takes effect on next cycle)."""
+        """Update the global default interval for a category.
+
+        Sleeping loops are woken and re-time their current wait against
+        the new interval (measured from their last run).
+        """
         self._default_intervals[category] = interval
+        self._interval_changed.set()
+        self._interval_changed = asyncio.Event()
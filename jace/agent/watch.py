@@ -9,6 +9,7 @@ import re
 from dataclasses import dataclass
 
 from jace.agent.metrics_store import MetricPoint, MetricsStore
+from jace.agent.scheduler import stagger_offset
 from jace.device.manager import DeviceManager
 
 logger = logging.getLogger(__name__)
@@ -140,7 +141,7 @@ class WatchManager:
     async def _collection_loop(self, watch: Watch) -> None:
         """Run command, extract metric, record to store — repeat."""
         # Stagger initial start to avoid thundering herd
-        stagger = hash(watch.id) % min(10, watch.interval)
+        stagger = stagger_offset(watch.id, min(10, watch.interval))
         await asyncio.sleep(stagger)
 
         compiled = re.compile(watch.parse_pattern)
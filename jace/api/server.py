@@ -109,15 +109,18 @@ def create_api_app(agent: AgentCore, device_manager: DeviceManager,
             except (KeyError, ValueError):
                 pass  # use as-is for historical lookups
         if include_resolved:
-            findings = await findings_tracker.get_history(
-                device=resolved_device, include_resolved=True,
-            )
+            result = [
+                f.to_dict() async for f in findings_tracker.iter_history(
+                    device=resolved_device, include_resolved=True,
+                )
+            ]
         else:
             sev = Severity(severity) if severity else None
-            findings = findings_tracker.get_active(
-                device=resolved_device, severity=sev, category=category,
-            )
-        result = [f.to_dict() for f in findings]
+            result = [
+                f.to_dict() for f in findings_tracker.get_active(
+                    device=resolved_device, severity=sev, category=category,
+                )
+            ]
         if device_category:
             cat_devices = {
                 d.device_key
@@ -96,6 +96,7 @@ class Application:
         if self.settings.correlation.enabled:
             self.anomaly_accumulator = AnomalyAccumulator(
                 window_seconds=self.settings.correlation.window_seconds,
+                max_batch_entries=self.settings.correlation.max_batch_entries,
             )
 
         # MCP server manager (optional)
@@ -39,6 +39,9 @@ class LLMConfig(BaseModel):
     system_prompt: str | None = None
     log_file: str | None = None
     log_format: str = "text"
+    # Reuse a background check's final reply for an identical request made
+    # within this many seconds (0 disables)
+    response_cache_ttl: float = 300.0
 
 
 class DeviceConfig(BaseModel):
@@ -91,6 +94,7 @@ class HeartbeatConfig(BaseModel):
 class CorrelationConfig(BaseModel):
     enabled: bool = True
     window_seconds: float = 30.0
+    max_batch_entries: int = 50
 
 
 class APIConfig(BaseModel):
@@ -17,6 +17,13 @@ from jace.llm.base import (
 
 logger = logging.getLogger(__name__)
 
+# Prompt-caching breakpoint.  The API caches the prefix up to each marked
+# block, so tools + system (identical on every call) and the conversation
+# so far (identical on the next tool-loop iteration) are billed and
+# prefilled once instead of on every turn.  Prefixes below the model's
+# minimum cacheable length are simply not cached.
+_CACHE_CONTROL = {"type": "ephemeral"}
+
 
 class AnthropicClient(LLMClient):
     """LLM client using the Anthropic SDK."""
@@ -25,6 +32,8 @@ class AnthropicClient(LLMClient):
         super().__init__(model, api_key)
         import anthropic
         self._client = anthropic.AsyncAnthropic(api_key=api_key)
+        # (tools it was built from, API payload) — the tool list rarely changes
+        self._api_tools: tuple[tuple[ToolDefinition, ...], list[dict]] | None = None
 
     async def chat(self, messages: list[Message],
                    tools: list[ToolDefinition] | None = None,
@@ -37,9 +46,13 @@ class AnthropicClient(LLMClient):
             "max_tokens": max_tokens,
         }
         if system:
-            kwargs["system"] = system
+            kwargs["system"] = [{
+                "type": "text",
+                "text": system,
+                "cache_control": _CACHE_CONTROL,
+            }]
         if tools:
-            kwargs["tools"] = self._convert_tools(tools)
+            kwargs["tools"] = self._cached_tools(tools)
 
         try:
             resp = await self._client.messages.create(**kwargs)
@@ -83,10 +96,31 @@ class AnthropicClient(LLMClient):
                     "role": msg.role.value,
                     "content": msg.content,
                 })
+        if result:
+            self._mark_cache_breakpoint(result[-1])
         return result
 
+    @staticmethod
+    def _mark_cache_breakpoint(message: dict) -> None:
+        """Mark the last content block of *message* as a cache breakpoint."""
+        content = message["content"]
+        if isinstance(content, str):
+            if not content:
+                return
+            content = [{"type": "text", "text": content}]
+            message["content"] = content
+        if content:
+            content[-1]["cache_control"] = _CACHE_CONTROL
+
+    def _cached_tools(self, tools: list[ToolDefinition]) -> list[dict]:
+        """Return the API payload for *tools*, converting only on change."""
+        key = tuple(tools)
+        if self._api_tools is None or self._api_tools[0] != key:
+            self._api_tools = (key, self._convert_tools(tools))
+        return self._api_tools[1]
+
     def _convert_tools(self, tools: list[ToolDefinition]) -> list[dict]:
-        return [
+        result = [
             {
                 "name": t.name,
                 "description": t.description,
@@ -94,6 +128,10 @@ class AnthropicClient(LLMClient):
             }
             for t in tools
         ]
+        if result:
+            # Tools precede the system prompt in the cached prefix
+            result[-1]["cache_control"] = _CACHE_CONTROL
+        return result
 
     def _parse_response(self, resp: Any) -> Response:
         content_parts = []
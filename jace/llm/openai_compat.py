@@ -28,6 +28,8 @@ class OpenAICompatClient(LLMClient):
         if base_url:
             client_kwargs["base_url"] = base_url
         self._client = openai.AsyncOpenAI(**client_kwargs)
+        # (tools it was built from, API payload) — the tool list rarely changes
+        self._api_tools: tuple[tuple[ToolDefinition, ...], list[dict]] | None = None
 
     async def chat(self, messages: list[Message],
                    tools: list[ToolDefinition] | None = None,
@@ -40,7 +42,7 @@ class OpenAICompatClient(LLMClient):
             "max_tokens": max_tokens,
         }
         if tools:
-            kwargs["tools"] = self._convert_tools(tools)
+            kwargs["tools"] = self._cached_tools(tools)
 
         try:
             resp = await self._client.chat.completions.create(**kwargs)
@@ -90,6 +92,13 @@ class OpenAICompatClient(LLMClient):
                 })
         return result
 
+    def _cached_tools(self, tools: list[ToolDefinition]) -> list[dict]:
+        """Return the API payload for *tools*, converting only on change."""
+        key = tuple(tools)
+        if self._api_tools is None or self._api_tools[0] != key:
+            self._api_tools = (key, self._convert_tools(tools))
+        return self._api_tools[1]
+
     def _convert_tools(self, tools: list[ToolDefinition]) -> list[dict]:
         return [
             {
@@ -120,6 +120,28 @@ async def test_flush_all_dispatches_immediately():
     assert acc.pending_count == 0
 
 
+@pytest.mark.asyncio
+async def test_flush_all_dispatches_concurrently():
+    started: list[str] = []
+    release = asyncio.Event()
+
+    async def callback(batch: AnomalyBatch) -> None:
+        started.append(batch.device)
+        await release.wait()
+
+    acc = AnomalyAccumulator(window_seconds=999.0)
+    acc.set_callback(callback)
+    await acc.submit("r1", "chassis", [_anomaly()], "raw1")
+    await acc.submit("r2", "routing", [_anomaly()], "raw2")
+
+    flush = asyncio.create_task(acc.flush_all())
+    await asyncio.sleep(0.01)
+    # Both callbacks are in flight before either completes
+    assert sorted(started) == ["r1", "r2"]
+    release.set()
+    await flush
+
+
 @pytest.mark.asyncio
 async def test_stop_cancels_timers_and_flushes():
     callback = AsyncMock()
@@ -182,6 +204,23 @@ async def test_no_callback_when_nothing_pending():
     callback.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_single_timer_handle_for_bursts():
+    acc = AnomalyAccumulator(window_seconds=999.0)
+    acc.set_callback(AsyncMock())
+
+    await acc.submit("r1", "chassis", [_anomaly()], "raw1")
+    timer = acc._timer
+    for cat in ("interfaces", "routing", "system"):
+        await acc.submit("r1", cat, [_anomaly()], "raw")
+    await acc.submit("r2", "chassis", [_anomaly()], "raw")
+
+    assert isinstance(timer, asyncio.TimerHandle)
+    assert acc._timer is timer
+    await acc.stop()
+    assert timer.cancelled()
+
+
 def test_anomaly_batch_categories_property():
     batch = AnomalyBatch(
         device="r1",
@@ -191,3 +230,46 @@ def test_anomaly_batch_categories_property():
         ],
     )
     assert batch.categories == ["chassis", "interfaces"]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_immediately():
+    callback = AsyncMock()
+    acc = AnomalyAccumulator(window_seconds=999.0, max_batch_entries=3)
+    acc.set_callback(callback)
+
+    for cat in ("chassis", "interfaces", "routing"):
+        await acc.submit("r1", cat, [_anomaly()], "raw")
+    await asyncio.sleep(0)
+
+    callback.assert_called_once()
+    assert callback.call_args[0][0].categories == [
+        "chassis", "interfaces", "routing",
+    ]
+    assert acc.pending_count == 0
+    await acc.stop()
+    callback.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_raw_data_is_capped():
+    callback = AsyncMock()
+    acc = AnomalyAccumulator(window_seconds=999.0, max_raw_chars=10)
+    acc.set_callback(callback)
+
+    await acc.submit("r1", "chassis", [_anomaly()], "x" * 100)
+    await acc.flush_all()
+
+    raw = callback.call_args[0][0].entries[0].raw_data
+    assert raw.startswith("x" * 10)
+    assert "truncated" in raw
+    assert len(raw) < 100
+
+
+def test_anomaly_entry_prebuilds_prompt_block():
+    entry = AnomalyEntry(
+        category="chassis", anomalies=[_anomaly("cpu_temp")], raw_data="raw1",
+    )
+    assert entry.block.startswith("=== chassis ===\nDetected anomalies:\n")
+    assert "ANOMALY: cpu_temp = 95.0C" in entry.block
+    assert entry.block.endswith("Raw command output:\nraw1\n")
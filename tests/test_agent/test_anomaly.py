@@ -0,0 +1,167 @@
+"""Tests for AnomalyDetector — Z-score detection over the metrics window."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from jace.agent.anomaly import AnomalyDetector, AnomalyResult
+from jace.agent.metrics_store import MetricPoint, MetricsStore
+
+
+@pytest.fixture
+async def store(tmp_path: Path):
+    s = MetricsStore(tmp_path)
+    await s.initialize()
+    yield s
+    await s.close()
+
+
+async def _seed(store: MetricsStore, values: list[float],
+                metric: str = "re_cpu_pct", device: str = "mx-01") -> None:
+    await store.record_many([
+        MetricPoint(device=device, category="chassis", metric=metric,
+                     value=v, unit="%")
+        for v in values
+    ])
+
+
+@pytest.mark.asyncio
+async def test_check_flags_outlier(store: MetricsStore):
+    await _seed(store, [10.0, 12.0] * 10)
+    detector = AnomalyDetector(store, z_threshold=3.0, min_samples=10)
+
+    result = await detector.check("mx-01", "re_cpu_pct", 20.0, "%")
+    assert result is not None
+    assert result.mean == pytest.approx(11.0)
+    assert result.stddev == pytest.approx(1.0)
+    assert result.z_score == pytest.approx(9.0)
+    assert result.unit == "%"
+
+
+@pytest.mark.asyncio
+async def test_check_ignores_normal_value(store: MetricsStore):
+    await _seed(store, [10.0, 12.0] * 10)
+    detector = AnomalyDetector(store, z_threshold=3.0, min_samples=10)
+
+    assert await detector.check("mx-01", "re_cpu_pct", 12.5) is None
+
+
+@pytest.mark.asyncio
+async def test_check_requires_min_samples(store: MetricsStore):
+    await _seed(store, [10.0, 12.0] * 2)
+    detector = AnomalyDetector(store, z_threshold=3.0, min_samples=10)
+
+    assert await detector.check("mx-01", "re_cpu_pct", 100.0) is None
+
+
+@pytest.mark.asyncio
+async def test_check_flat_series_never_anomalous(store: MetricsStore):
+    await _seed(store, [5.0] * 20)
+    detector = AnomalyDetector(store, z_threshold=3.0, min_samples=10)
+
+    assert await detector.check("mx-01", "re_cpu_pct", 500.0) is None
+
+
+@pytest.mark.asyncio
+async def test_check_many_returns_only_anomalies(store: MetricsStore):
+    await _seed(store, [10.0, 12.0] * 10, metric="re_cpu_pct")
+    await _seed(store, [100.0, 102.0] * 10, metric="re_mem_pct")
+    detector = AnomalyDetector(store, z_threshold=3.0, min_samples=10)
+
+    results = await detector.check_many("mx-01", [
+        MetricPoint(device="mx-01", category="chassis", metric="re_cpu_pct",
+                     value=30.0, unit="%"),
+        MetricPoint(device="mx-01", category="chassis", metric="re_mem_pct",
+                     value=101.0, unit="%"),
+    ])
+    assert [r.metric for r in results] == ["re_cpu_pct"]
+
+
+@pytest.mark.asyncio
+async def test_check_many_fetches_all_metrics_in_one_call(store: MetricsStore):
+    await _seed(store, [10.0, 12.0] * 10)
+    detector = AnomalyDetector(store, z_threshold=3.0, min_samples=10)
+    calls: list[list[str]] = []
+    original = store.stats_many
+
+    async def spy(device, metrics, **kwargs):
+        calls.append(list(metrics))
+        return await original(device, metrics, **kwargs)
+
+    store.stats_many = spy  # type: ignore[method-assign]
+    results = await detector.check_many("mx-01", [
+        MetricPoint(device="mx-01", category="chassis", metric=metric,
+                     value=v)
+        for metric, v in (("re_cpu_pct", 11.0), ("re_cpu_pct", 30.0),
+                          ("re_mem_pct", 5.0), ("re_cpu_pct", 40.0))
+    ])
+
+    assert calls == [["re_cpu_pct", "re_mem_pct"]]
+    assert [r.value for r in results] == [30.0, 40.0]
+
+
+@pytest.mark.asyncio
+async def test_window_stats_reused_while_version_unchanged(store: MetricsStore):
+    await _seed(store, [10.0, 12.0] * 10)
+    detector = AnomalyDetector(store, z_threshold=3.0, min_samples=10)
+    calls = 0
+    original = store.stats
+
+    async def spy(device, metric, **kwargs):
+        nonlocal calls
+        calls += 1
+        return await original(device, metric, **kwargs)
+
+    store.stats = spy  # type: ignore[method-assign]
+    assert await detector.check("mx-01", "re_cpu_pct", 20.0) is not None
+    assert await detector.check("mx-01", "re_cpu_pct", 21.0) is not None
+    assert calls == 1
+
+    # New points bump the version and invalidate the cached baseline
+    await _seed(store, [20.0] * 100)
+    assert await detector.check("mx-01", "re_cpu_pct", 20.0) is None
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_window_stats_not_cached_while_warming_up(store: MetricsStore):
+    await _seed(store, [10.0, 12.0] * 2)
+    detector = AnomalyDetector(store, z_threshold=3.0, min_samples=10)
+    assert await detector.check("mx-01", "re_cpu_pct", 20.0) is None
+
+    await _seed(store, [10.0, 12.0] * 8)
+    assert await detector.check("mx-01", "re_cpu_pct", 20.0) is not None
+
+
+def test_anomaly_result_context_line_is_cached():
+    result = AnomalyResult(
+        metric="re_cpu_pct", value=95.0, mean=20.0,
+        stddev=5.0, z_score=15.0, unit="%",
+    )
+    line = result.to_context_line()
+    assert line == (
+        "ANOMALY: re_cpu_pct = 95.0% (mean=20.00, stddev=5.00, z-score=15.00)"
+    )
+    assert result.to_context_line() is line
+    with pytest.raises(AttributeError):
+        result.value = 1.0  # type: ignore[misc]
+
+
+@pytest.mark.asyncio
+async def test_window_rolling_into_constant_values_has_zero_stddev(
+    store: MetricsStore,
+):
+    import random
+
+    rng = random.Random(7)
+    await _seed(store, [rng.uniform(0.0, 100.0) for _ in range(1000)])
+    detector = AnomalyDetector(store, z_threshold=3.0, min_samples=10)
+    await detector.check("mx-01", "re_cpu_pct", 50.0)  # seeds the window
+
+    # Every varying point is pushed out of the 1000-point window
+    await _seed(store, [42.0] * 1000)
+    assert await store.stats("mx-01", "re_cpu_pct") == (1000, 42.0, 0.0)
+    assert await detector.check("mx-01", "re_cpu_pct", 42.0) is None
+    assert await detector.check("mx-01", "re_cpu_pct", 42.5) is None
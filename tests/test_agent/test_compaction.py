@@ -8,7 +8,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 
 from jace.agent.context import ConversationContext
-from jace.agent.core import AgentCore
+from jace.agent.core import SUMMARIZE_PROMPT, AgentCore
 from jace.agent.findings import FindingsTracker
 from jace.agent.memory import MemoryStore
 from jace.agent.metrics_store import MetricsStore
@@ -191,6 +191,25 @@ class TestCompactContext:
         await agent._compact_context(ctx)
         assert ctx.message_count <= 10
 
+        sent = llm.chat.call_args.kwargs["messages"]
+        assert len(sent) == 46
+        assert sent[-1].role == Role.USER
+        assert sent[-1].content == SUMMARIZE_PROMPT
+
+    @pytest.mark.asyncio
+    async def test_interactive_context_stays_bounded(self) -> None:
+        """Long sessions never grow the interactive context past max_messages."""
+        llm = AsyncMock()
+        llm.chat = AsyncMock(
+            return_value=Response(content="ok", stop_reason="end_turn"),
+        )
+        agent = _make_agent(llm=llm, memory_store=None)
+        ctx = agent._interactive_ctx
+
+        for i in range(200):
+            await agent.handle_user_input(f"question {i}")
+            assert len(ctx.raw_messages) <= ctx._max_messages
+
     @pytest.mark.asyncio
     async def test_graceful_on_llm_failure(self, tmp_path: Path) -> None:
         """If LLM calls fail, compaction still proceeds with fallback summary."""
@@ -326,3 +345,21 @@ class TestBuildSystemPrompt:
         agent = _make_agent(memory_store=store)
         prompt = agent._build_system_prompt()
         assert "Persistent Memory" not in prompt
+
+    def test_reuses_prompt_until_memory_changes(self, tmp_path: Path) -> None:
+        store = MemoryStore(tmp_path)
+        store.initialize()
+        store.save_user_preferences("Always show set format")
+        agent = _make_agent(memory_store=store)
+
+        with patch.object(
+            store, "build_memory_context", wraps=store.build_memory_context,
+        ) as build:
+            first = agent._build_system_prompt()
+            assert agent._build_system_prompt() is first
+            assert build.call_count == 1
+
+            store.save_user_preferences("Prefer brief output")
+            prompt = agent._build_system_prompt()
+            assert build.call_count == 2
+        assert "Prefer brief output" in prompt
@@ -84,3 +84,49 @@ def test_raw_messages_excludes_summary():
     raw = ctx.raw_messages
     assert len(raw) == 1
     assert raw[0].content == "msg 2"
+
+
+def test_messages_view_cached_until_mutation():
+    ctx = ConversationContext()
+    ctx.add_user("hello")
+    first = ctx.messages
+    assert ctx.messages is first
+
+    ctx.add_tool_result("call-1", "data")
+    second = ctx.messages
+    assert second is not first
+    assert len(first) == 1  # earlier view is never mutated in place
+    assert len(second) == 2
+
+    ctx.compact("summary", keep_recent=1)
+    assert ctx.messages is not second
+    assert len(ctx.messages) == 3
+
+
+def test_clone_is_independent_and_keeps_summary():
+    ctx = ConversationContext()
+    ctx.add_user("msg 1")
+    ctx.add_user("msg 2")
+    ctx.compact("summary", keep_recent=1)
+    ctx.add_tool_result("call-1", "data")
+
+    copy = ctx.clone(extra_capacity=10)
+    assert copy.messages == ctx.messages
+    assert copy.messages[-1].tool_call_id == "call-1"
+
+    copy.add_user("flush prompt")
+    assert ctx.message_count == 2
+    assert copy.message_count == 3
+
+
+def test_needs_compaction_on_content_size():
+    ctx = ConversationContext(max_messages=50, max_chars=100)
+    ctx.add_user("x" * 40)
+    ctx.add_tool_result("call-1", "y" * 39)
+    assert not ctx.needs_compaction
+    ctx.add_assistant(Message(role=Role.ASSISTANT, content="z"))
+    assert ctx.needs_compaction  # 80 chars = 80% of 100
+
+    ctx.compact("summary", keep_recent=1)
+    assert not ctx.needs_compaction
+    assert ctx.clone()._chars == 1
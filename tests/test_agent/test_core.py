@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -15,14 +16,19 @@ from jace.agent.core import (
     ANALYSIS_PROMPT_TEMPLATE,
     ANOMALY_PROMPT_TEMPLATE,
     AgentCore,
+    _json_dumps,
+    _PromptTemplate,
+    _ResponseCache,
 )
 from jace.agent.findings import Finding, FindingsTracker, Severity
 from jace.agent.metrics_store import MetricPoint, MetricsStore
+from jace.agent.scheduler import stagger_offset
 from jace.checks.registry import CheckRegistry
 from jace.config.settings import CorrelationConfig, LLMConfig, ScheduleConfig, Settings
 from jace.device.manager import DeviceManager
 from jace.device.models import CommandResult
-from jace.llm.base import Response, Role
+from jace.llm.base import Response, Role, ToolCall, ToolDefinition
+from jace.llm.tools import AGENT_TOOLS
 
 
 def _make_agent(
@@ -53,6 +59,13 @@ def _make_agent(
     )
 
 
+def _upsert_many_mock(is_new: bool = True) -> AsyncMock:
+    """add_or_update_many stand-in returning one result per record."""
+    return AsyncMock(
+        side_effect=lambda records: [(_make_finding(), is_new) for _ in records],
+    )
+
+
 def _make_finding(
     device: str = "r1", severity: Severity = Severity.WARNING,
     category: str = "interfaces", title: str = "High error rate",
@@ -233,9 +246,12 @@ async def test_run_check_logs_normal_status(caplog):
         MagicMock(metric="cpu_temp", value=60.0, unit="C", tags={}, is_counter=False),
     ])}):
         with caplog.at_level(logging.INFO, logger="jace.agent.core"):
-            await agent._run_check("chassis", "test-router")
+            with patch.object(AgentCore, "_format_results") as fmt:
+                await agent._run_check("chassis", "test-router")
 
     assert any("Normal" in record.message for record in caplog.records)
+    # Raw output is only rendered when it will be sent to the LLM
+    fmt.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -267,6 +283,84 @@ async def test_extract_returns_anomaly_list():
     assert result[0].metric == "cpu_temp"
 
 
+@pytest.mark.asyncio
+async def test_extract_counter_deltas_use_one_lookup():
+    """Counter deltas should come from a single latest_many() call."""
+    metrics_store = AsyncMock(spec=MetricsStore)
+    metrics_store.latest_many = AsyncMock(return_value={
+        "in_errors": MetricPoint(
+            device="r1", category="interfaces", metric="in_errors", value=10.0,
+        ),
+    })
+
+    agent = _make_agent(metrics_store=metrics_store)
+
+    with patch("jace.agent.core.EXTRACTORS", {"interfaces": MagicMock(return_value=[
+        MagicMock(metric="in_errors", value=15.0, unit="", tags={}, is_counter=True),
+        MagicMock(metric="out_errors", value=4.0, unit="", tags={}, is_counter=True),
+        MagicMock(metric="oper_up", value=1.0, unit="", tags={}, is_counter=False),
+    ])}):
+        await agent._extract_and_check_metrics("interfaces", "r1", _sample_results())
+
+    metrics_store.latest_many.assert_awaited_once_with(
+        "r1", ["in_errors", "out_errors"],
+    )
+    recorded = {p.metric: p.value for p in metrics_store.record_many.call_args[0][0]}
+    assert recorded["in_errors_delta"] == 5.0
+    assert "out_errors_delta" not in recorded
+
+
+# ---------- In-flight check de-duplication ----------
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_checks_share_one_run():
+    release = asyncio.Event()
+
+    async def slow_run_category(*args, **kwargs):
+        await release.wait()
+        return {}
+
+    registry = AsyncMock(spec=CheckRegistry)
+    registry.run_category = AsyncMock(side_effect=slow_run_category)
+    agent = _make_agent(check_registry=registry)
+
+    first = asyncio.create_task(agent._run_check("chassis", "r1"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(agent._run_check("chassis", "r1"))
+    other = asyncio.create_task(agent._run_check("routing", "r1"))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, second, other)
+
+    assert registry.run_category.call_count == 2  # chassis once, routing once
+    assert agent._inflight_checks == {}
+
+
+@pytest.mark.asyncio
+async def test_user_check_does_not_join_scheduled_run():
+    release = asyncio.Event()
+
+    async def slow_run_category(*args, **kwargs):
+        await release.wait()
+        return {}
+
+    registry = AsyncMock(spec=CheckRegistry)
+    registry.run_category = AsyncMock(side_effect=slow_run_category)
+    agent = _make_agent(check_registry=registry)
+
+    scheduled = asyncio.create_task(agent._run_check("chassis", "r1"))
+    await asyncio.sleep(0)
+    user = asyncio.create_task(
+        agent._run_check("chassis", "r1", _user_triggered=True),
+    )
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(scheduled, user)
+
+    assert registry.run_category.call_count == 2
+
+
 # ---------- Cross-context enrichment tests ----------
 
 
@@ -490,9 +584,7 @@ async def test_investigate_anomaly_batch_calls_llm():
 async def test_process_batch_analysis_routes_by_category():
     """Findings with category field are routed to correct tracker bucket."""
     findings_tracker = AsyncMock(spec=FindingsTracker)
-    findings_tracker.add_or_update = AsyncMock(
-        return_value=(_make_finding(), True),
-    )
+    findings_tracker.add_or_update_many = _upsert_many_mock()
     findings_tracker.resolve_missing = AsyncMock(return_value=[])
 
     agent = _make_agent(findings_tracker=findings_tracker)
@@ -506,11 +598,12 @@ async def test_process_batch_analysis_routes_by_category():
 
     await agent._process_batch_analysis("r1", ["chassis", "interfaces"], analysis)
 
-    # add_or_update called twice — once per finding
-    assert findings_tracker.add_or_update.call_count == 2
+    # One batched write per category
+    assert findings_tracker.add_or_update_many.call_count == 2
     categories_used = [
-        call.kwargs["category"]
-        for call in findings_tracker.add_or_update.call_args_list
+        record["category"]
+        for call in findings_tracker.add_or_update_many.call_args_list
+        for record in call.args[0]
     ]
     assert "chassis" in categories_used
     assert "interfaces" in categories_used
@@ -523,9 +616,7 @@ async def test_process_batch_analysis_routes_by_category():
 async def test_process_batch_analysis_fallback_category():
     """Findings without category field fall back to first category."""
     findings_tracker = AsyncMock(spec=FindingsTracker)
-    findings_tracker.add_or_update = AsyncMock(
-        return_value=(_make_finding(), True),
-    )
+    findings_tracker.add_or_update_many = _upsert_many_mock()
     findings_tracker.resolve_missing = AsyncMock(return_value=[])
 
     agent = _make_agent(findings_tracker=findings_tracker)
@@ -537,8 +628,55 @@ async def test_process_batch_analysis_fallback_category():
 
     await agent._process_batch_analysis("r1", ["chassis", "interfaces"], analysis)
 
-    call = findings_tracker.add_or_update.call_args
-    assert call.kwargs["category"] == "chassis"  # fallback to first
+    [record] = findings_tracker.add_or_update_many.call_args.args[0]
+    assert record["category"] == "chassis"  # fallback to first
+
+
+@pytest.mark.asyncio
+async def test_process_analysis_collapses_duplicate_titles():
+    """Repeated titles reach the tracker once, at their highest severity."""
+    findings_tracker = AsyncMock(spec=FindingsTracker)
+    findings_tracker.add_or_update_many = _upsert_many_mock(is_new=False)
+    findings_tracker.resolve_missing = AsyncMock(return_value=[])
+
+    agent = _make_agent(findings_tracker=findings_tracker)
+
+    analysis = json.dumps([
+        {"severity": "warning", "title": "High temp", "detail": "first"},
+        {"severity": "critical", "title": "High temp", "detail": "second"},
+        {"severity": "info", "title": "High temp", "detail": "third"},
+        {"severity": "info", "title": "Fan slow", "detail": "d"},
+    ])
+
+    await agent._process_analysis("r1", "chassis", analysis)
+
+    findings_tracker.add_or_update_many.assert_awaited_once()
+    records = findings_tracker.add_or_update_many.call_args.args[0]
+    assert [r["title"] for r in records] == ["High temp", "Fan slow"]
+    assert records[0]["severity"] == Severity.CRITICAL
+    assert records[0]["detail"] == "second"
+    findings_tracker.resolve_missing.assert_awaited_once_with(
+        "r1", "chassis", {"High temp", "Fan slow"},
+    )
+
+
+def test_unique_findings_defaults_unknown_severity_to_info():
+    unique = AgentCore._unique_findings([
+        {"title": "a", "severity": "urgent"},
+        {"title": "b", "severity": ["critical"]},
+        {"title": "c"},
+        {"title": "d", "severity": "critical"},
+    ])
+    assert {t: sev for t, (sev, _) in unique.items()} == {
+        "a": Severity.INFO, "b": Severity.INFO,
+        "c": Severity.INFO, "d": Severity.CRITICAL,
+    }
+
+
+def test_unique_findings_interns_titles():
+    first = AgentCore._unique_findings([{"title": "".join(["Fan ", "slow"])}])
+    second = AgentCore._unique_findings([{"title": "".join(["Fan", " slow"])}])
+    assert next(iter(first)) is next(iter(second))
 
 
 # ---------- Prompt memory instruction tests ----------
@@ -556,6 +694,20 @@ def test_analysis_prompt_contains_memory_instructions():
     assert "save_memory" in ANALYSIS_PROMPT_TEMPLATE
 
 
+def test_prompt_template_matches_str_format():
+    template = "Device '{device}' {{literal}} [{category}]\n{data}"
+    values = {"device": "r1", "category": "chassis", "data": "raw"}
+    assert _PromptTemplate(template).format(**values) == template.format(**values)
+    assert (
+        _PromptTemplate(ANOMALY_PROMPT_TEMPLATE).format(
+            device="r1", category="chassis", anomalies="a", data="d", context="",
+        )
+        == ANOMALY_PROMPT_TEMPLATE.format(
+            device="r1", category="chassis", anomalies="a", data="d", context="",
+        )
+    )
+
+
 # ---------- stop_monitoring integration ----------
 
 
@@ -570,6 +722,34 @@ async def test_stop_monitoring_calls_accumulator_stop():
     accumulator.stop.assert_awaited_once()
 
 
+@pytest.mark.asyncio
+async def test_slow_notifier_does_not_block_analysis():
+    """Notifications are queued; stop_monitoring drains them."""
+    findings_tracker = AsyncMock(spec=FindingsTracker)
+    findings_tracker.add_or_update_many = _upsert_many_mock()
+    findings_tracker.resolve_missing = AsyncMock(return_value=[])
+    agent = _make_agent(findings_tracker=findings_tracker)
+
+    release = asyncio.Event()
+    delivered: list[bool] = []
+
+    async def slow_notify(finding, is_new):
+        await release.wait()
+        delivered.append(is_new)
+
+    agent.set_notify_callback(slow_notify)
+    analysis = json.dumps([{"severity": "warning", "title": "High temp"}])
+
+    await asyncio.wait_for(
+        agent._process_analysis("r1", "chassis", analysis), timeout=1,
+    )
+    assert delivered == []
+
+    release.set()
+    await agent.stop_monitoring()
+    assert delivered == [True]
+
+
 # ---------- CorrelationConfig defaults ----------
 
 
@@ -635,3 +815,281 @@ def test_scheduler_no_device_schedules():
     """Scheduler should work without device_schedules."""
     agent = _make_agent()
     assert agent._scheduler._device_schedules == {}
+
+
+# ---------- Tool result serialization ----------
+
+
+def test_json_dumps_round_trips_and_stringifies_unknown_types():
+    class Opaque:
+        def __str__(self) -> str:
+            return "opaque"
+
+    text = _json_dumps({"facts": {"hostname": "r1", "uptime": 5, "x": Opaque()}})
+    assert "\n  " in text  # indented
+    assert json.loads(text) == {
+        "facts": {"hostname": "r1", "uptime": 5, "x": "opaque"},
+    }
+    # Values orjson cannot encode fall back to the stdlib encoder
+    assert json.loads(_json_dumps({"huge": 2**70})) == {"huge": 2**70}
+
+
+def test_every_agent_tool_has_a_handler():
+    agent = _make_agent()
+    assert set(agent._tool_handlers) == {t.name for t in AGENT_TOOLS}
+
+
+@pytest.mark.asyncio
+async def test_execute_tool_unknown_name():
+    agent = _make_agent()
+    result = await agent._execute_tool(ToolCall(id="t1", name="nope", arguments={}))
+    assert result == "Unknown tool: nope"
+
+
+@pytest.mark.asyncio
+async def test_get_findings_tool_rejects_unknown_severity():
+    agent = _make_agent()
+    result = await agent._execute_tool(ToolCall(
+        id="t1", name="get_findings", arguments={"severity": "urgent"},
+    ))
+    assert result == "Error: unknown severity 'urgent'"
+    agent._findings.get_active.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_in_one_response_run_concurrently():
+    calls = [
+        ToolCall(id="a", name="run_command", arguments={"device": "r1", "command": "x"}),
+        ToolCall(id="b", name="run_command", arguments={"device": "r2", "command": "y"}),
+    ]
+    llm = AsyncMock()
+    llm.chat = AsyncMock(side_effect=[
+        Response(tool_calls=calls),
+        Response(content="done"),
+    ])
+    agent = _make_agent(llm=llm)
+
+    started: list[str] = []
+    both_started = asyncio.Event()
+
+    async def fake_execute(tool_call):
+        started.append(tool_call.id)
+        if len(started) == 2:
+            both_started.set()
+        # Would deadlock if the calls ran one after another
+        await asyncio.wait_for(both_started.wait(), timeout=1)
+        return f"result-{tool_call.id}"
+
+    agent._execute_tool = fake_execute
+    ctx = ConversationContext()
+    ctx.add_user("go")
+
+    assert await agent._llm_tool_loop(ctx) == "done"
+    tool_results = [m for m in ctx.messages if m.role == Role.TOOL]
+    assert [(m.tool_call_id, m.content) for m in tool_results] == [
+        ("a", "result-a"), ("b", "result-b"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_identical_tool_calls_share_one_execution():
+    agent = _make_agent()
+    executed: list[str] = []
+
+    async def fake_execute(tool_call):
+        executed.append(tool_call.id)
+        return f"out-{tool_call.arguments['command']}"
+
+    agent._execute_tool = fake_execute
+    calls = [
+        ToolCall(id="a", name="run_command", arguments={"device": "r1", "command": "x"}),
+        ToolCall(id="b", name="run_command", arguments={"command": "x", "device": "r1"}),
+        ToolCall(id="c", name="run_command", arguments={"device": "r1", "command": "y"}),
+    ]
+
+    assert await agent._execute_tool_calls(calls) == ["out-x", "out-x", "out-y"]
+    assert executed == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_device_io_tools_are_bounded_per_device():
+    device_manager = MagicMock(spec=DeviceManager)
+    device_manager.resolve_device = MagicMock(side_effect=lambda d: d)
+    active: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    async def run_command(device, command):
+        active[device] = active.get(device, 0) + 1
+        peak[device] = max(peak.get(device, 0), active[device])
+        await asyncio.sleep(0.01)
+        active[device] -= 1
+        return CommandResult(command=command, output="ok")
+
+    device_manager.run_command = run_command
+    agent = _make_agent(device_manager=device_manager)
+    calls = [
+        ToolCall(id=str(i), name="run_command",
+                 arguments={"device": dev, "command": f"show {i}"})
+        for i, dev in enumerate(["r1"] * 5 + ["r2"] * 2)
+    ]
+
+    with patch("jace.agent.core.DEVICE_TOOL_CONCURRENCY", 2):
+        results = await agent._execute_tool_calls(calls)
+
+    assert results == ["ok"] * 7
+    assert peak == {"r1": 2, "r2": 2}
+
+
+@pytest.mark.asyncio
+async def test_background_replies_are_cached_but_interactive_are_not():
+    llm = AsyncMock()
+    llm.chat = AsyncMock(return_value=Response(content="[]"))
+    agent = _make_agent(llm=llm)
+
+    for _ in range(2):
+        ctx = ConversationContext()
+        ctx.add_user("analyze this")
+        assert await agent._llm_tool_loop(ctx) == "[]"
+    assert llm.chat.await_count == 1
+
+    for _ in range(2):
+        agent._interactive_ctx.clear()
+        agent._interactive_ctx.add_user("analyze this")
+        await agent._llm_tool_loop(agent._interactive_ctx)
+    assert llm.chat.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_replies_requesting_tools_are_not_cached():
+    tool_reply = Response(tool_calls=[ToolCall(id="a", name="list_devices", arguments={})])
+    llm = AsyncMock()
+    llm.chat = AsyncMock(side_effect=[tool_reply, tool_reply])
+    agent = _make_agent(llm=llm)
+    key = agent._response_cache.key([], None, "s", 1, "m")
+
+    await agent._chat([], [], "s", cacheable=True)
+    await agent._chat([], [], "s", cacheable=True)
+    assert llm.chat.await_count == 2
+    assert agent._response_cache.get(key) is None
+
+
+@pytest.mark.asyncio
+async def test_llm_errors_are_not_cached():
+    error = Response(content="LLM Error: overloaded", stop_reason="error")
+    llm = AsyncMock()
+    llm.chat = AsyncMock(side_effect=[error, Response(content="[]")])
+    agent = _make_agent(llm=llm)
+
+    assert (await agent._chat([], [], "s", cacheable=True)) is error
+    assert (await agent._chat([], [], "s", cacheable=True)).content == "[]"
+    assert llm.chat.await_count == 2
+
+def test_response_cache_key_covers_tool_definitions():
+    tool = ToolDefinition(name="probe", description="v1", parameters={})
+    changed = ToolDefinition(name="probe", description="v1",
+                             parameters={"type": "object"})
+    key = _ResponseCache.key
+    assert key([], [tool], "s", 1, "m") == key([], [tool], "s", 1, "m")
+    assert key([], [tool], "s", 1, "m") != key([], [changed], "s", 1, "m")
+    redescribed = ToolDefinition(name="probe", description="v2", parameters={})
+    assert key([], [tool], "s", 1, "m") != key([], [redescribed], "s", 1, "m")
+
+def test_response_cache_expires_and_evicts():
+    cache = _ResponseCache(ttl=10.0, max_entries=2)
+    with patch("jace.agent.core.time.monotonic", return_value=100.0):
+        cache.put(b"a", Response(content="a"))
+        cache.put(b"b", Response(content="b"))
+        cache.put(b"c", Response(content="c"))
+        assert cache.get(b"a") is None  # evicted
+        assert cache.get(b"c").content == "c"
+    with patch("jace.agent.core.time.monotonic", return_value=111.0):
+        assert cache.get(b"c") is None  # expired
+
+
+def test_format_results_marks_failures():
+    results = {
+        "show a": CommandResult(command="show a", output="ok", success=True),
+        "show b": CommandResult(command="show b", output="", success=False,
+                                error="timeout"),
+    }
+    assert AgentCore._format_results(results) == (
+        "--- show a [SUCCESS] ---\nok\n\n--- show b [FAILED: timeout] ---\n\n"
+    )
+
+
+# ---------- _extract_json_array ----------
+
+
+def test_extract_json_array_bare_array():
+    text = '[{"severity": "info", "title": "ok"}]'
+    assert AgentCore._extract_json_array(text) == [
+        {"severity": "info", "title": "ok"},
+    ]
+
+
+def test_extract_json_array_fenced_with_prose():
+    text = 'Analysis done.\n```json\n[{"title": "a"}, {"title": "b"}]\n```\n'
+    result = AgentCore._extract_json_array(text)
+    assert [item["title"] for item in result] == ["a", "b"]
+
+
+def test_extract_json_array_falls_back_past_stray_brackets():
+    text = 'Saw [WARN] lines.\n```json\n[{"title": "a"}]\n```\nSee [1].'
+    assert AgentCore._extract_json_array(text) == [{"title": "a"}]
+
+
+def test_extract_json_array_fence_found_without_regex():
+    text = 'Saw [WARN] lines.\n```json\n[{"title": "a"}]\n```\nSee [1].'
+    with patch("jace.agent.core._JSON_ARRAY_PATTERNS", ()):
+        assert AgentCore._extract_json_array(text) == [{"title": "a"}]
+
+
+def test_extract_json_array_single_line_fence():
+    text = 'Found [1] issue: ```[{"title": "a"}]``` — see [2].'
+    assert AgentCore._extract_json_array(text) == [{"title": "a"}]
+
+
+def test_extract_json_array_unmatched_brackets_scan_linearly():
+    import time
+
+    text = "Saw [" * 10_000 + ' result: [{"title": "a"}] and [x' * 2
+    started = time.perf_counter()
+    assert AgentCore._extract_json_array(text) == [{"title": "a"}]
+    assert AgentCore._extract_json_array("[" * 20_000) == []
+    assert time.perf_counter() - started < 1.0
+
+@pytest.mark.asyncio
+async def test_parse_findings_offloads_large_replies():
+    agent = _make_agent()
+    small = '[{"title": "a"}]'
+    large = '[{"title": "a", "detail": "' + "x" * 70_000 + '"}]'
+
+    with patch("jace.agent.core.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+        assert await agent._parse_findings(small) == [{"title": "a"}]
+        to_thread.assert_not_called()
+        result = await agent._parse_findings(large)
+        to_thread.assert_called_once()
+    assert result[0]["title"] == "a"
+
+
+def test_extract_json_array_scans_balanced_nested_spans():
+    text = ('See [note]. Result: [{"title": "a", "tags": ["x", "y]"]}] '
+            'and [2.')
+    assert AgentCore._extract_json_array(text) == [
+        {"title": "a", "tags": ["x", "y]"]},
+    ]
+
+
+def test_extract_json_array_no_array():
+    assert AgentCore._extract_json_array("All clear, nothing to report.") == []
+
+
+# ---------- Startup stagger ----------
+
+
+def test_stagger_offset_is_stable_and_bounded():
+    offsets = {stagger_offset(f"heartbeat:{i}", 30) for i in range(50)}
+    assert all(0 <= o < 30 for o in offsets)
+    assert len(offsets) > 1
+    assert stagger_offset("heartbeat:a", 30) == stagger_offset("heartbeat:a", 30)
+    assert stagger_offset("heartbeat:a", 0) == 0
@@ -1,8 +1,10 @@
 """Tests for findings tracker."""
 
+from dataclasses import fields
+
 import pytest
 
-from jace.agent.findings import FindingsTracker, Severity
+from jace.agent.findings import Finding, FindingsTracker, Severity
 
 
 @pytest.mark.asyncio
@@ -65,3 +67,217 @@ async def test_get_active_filtering(findings_tracker: FindingsTracker):
 
     r2_findings = findings_tracker.get_active(device="r2")
     assert len(r2_findings) == 1
+
+
+@pytest.mark.asyncio
+async def test_indexes_follow_severity_change_and_resolve(
+    findings_tracker: FindingsTracker,
+):
+    await findings_tracker.add_or_update(
+        device="r1", severity=Severity.WARNING, category="chassis",
+        title="Fan speed high", detail="", recommendation="",
+    )
+    await findings_tracker.add_or_update(
+        device="r1", severity=Severity.CRITICAL, category="chassis",
+        title="Fan speed high", detail="", recommendation="",
+    )
+    assert findings_tracker.get_active(severity=Severity.WARNING) == []
+    assert len(findings_tracker.get_active(severity=Severity.CRITICAL)) == 1
+    assert findings_tracker.critical_count == 1
+
+    await findings_tracker.resolve_missing("r1", "chassis", set())
+    assert findings_tracker.get_active(device="r1") == []
+    assert findings_tracker.get_active(severity=Severity.CRITICAL) == []
+    assert findings_tracker.critical_count == 0
+
+
+@pytest.mark.asyncio
+async def test_add_or_update_many_persists_in_one_batch(
+    findings_tracker: FindingsTracker,
+):
+    await findings_tracker.add_or_update(
+        device="r1", severity=Severity.INFO, category="chassis",
+        title="Fan speed high", detail="old", recommendation="",
+    )
+    results = await findings_tracker.add_or_update_many([
+        {"device": "r1", "severity": Severity.WARNING, "category": "chassis",
+         "title": "Fan speed high", "detail": "new", "recommendation": ""},
+        {"device": "r1", "severity": Severity.CRITICAL, "category": "chassis",
+         "title": "PSU failed", "detail": "PSU 0", "recommendation": "RMA"},
+    ])
+
+    assert [is_new for _, is_new in results] == [False, True]
+    assert findings_tracker.critical_count == 1
+    history = await findings_tracker.get_history(device="r1")
+    assert {f.title: f.detail for f in history} == {
+        "Fan speed high": "new", "PSU failed": "PSU 0",
+    }
+
+
+@pytest.mark.asyncio
+async def test_to_dict_covers_every_field(findings_tracker: FindingsTracker):
+    finding, _ = await findings_tracker.add_or_update(
+        device="r1", severity=Severity.CRITICAL, category="chassis",
+        title="PSU failed", detail="", recommendation="",
+        raw_data={"psu": 0},
+    )
+    d = finding.to_dict()
+    assert list(d) == [f.name for f in fields(Finding)]
+    assert d["severity"] == "critical"
+    assert d["raw_data"] == {"psu": 0}
+    assert not hasattr(finding, "__dict__")
+
+
+@pytest.mark.asyncio
+async def test_database_uses_wal_journal(findings_tracker: FindingsTracker):
+    async with findings_tracker._db.execute("PRAGMA journal_mode") as cursor:
+        (mode,) = await cursor.fetchone()
+    assert mode == "wal"
+
+
+@pytest.mark.asyncio
+async def test_resolve_missing_persists_in_one_batch(
+    findings_tracker: FindingsTracker,
+):
+    await findings_tracker.add_or_update_many([
+        {"device": "r1", "severity": Severity.WARNING, "category": "chassis",
+         "title": title, "detail": "", "recommendation": ""}
+        for title in ("Fan 0", "Fan 1", "PSU failed")
+    ])
+    resolved = await findings_tracker.resolve_missing(
+        "r1", "chassis", {"PSU failed"},
+    )
+
+    assert sorted(f.title for f in resolved) == ["Fan 0", "Fan 1"]
+    assert [f.title for f in findings_tracker.get_active()] == ["PSU failed"]
+    history = await findings_tracker.get_history(device="r1")
+    assert {f.title: f.resolved for f in history} == {
+        "Fan 0": True, "Fan 1": True, "PSU failed": False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_history_uses_index(findings_tracker: FindingsTracker):
+    async with findings_tracker._db.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM findings WHERE device = ? "
+        "ORDER BY last_seen DESC LIMIT ?", ("r1", 10),
+    ) as cursor:
+        plan = " ".join(row[-1] for row in await cursor.fetchall())
+    assert "idx_findings_device_last_seen" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_raw_data_round_trips_through_storage(
+    findings_tracker: FindingsTracker,
+):
+    raw = {"psu": 0, "slots": [1, 2], "nested": {"ok": False}}
+    await findings_tracker.add_or_update(
+        device="r1", severity=Severity.CRITICAL, category="chassis",
+        title="PSU failed", detail="", recommendation="", raw_data=raw,
+    )
+    (stored,) = await findings_tracker.get_history(device="r1")
+    assert stored.raw_data == raw
+
+
+@pytest.mark.asyncio
+async def test_iter_history_streams_newest_first(
+    findings_tracker: FindingsTracker,
+):
+    for title in ("Fan 0", "Fan 1", "Fan 2"):
+        await findings_tracker.add_or_update(
+            device="r1", severity=Severity.WARNING, category="chassis",
+            title=title, detail="", recommendation="",
+        )
+    titles = [f.title async for f in findings_tracker.iter_history(limit=2)]
+    assert titles == ["Fan 2", "Fan 1"]
+    assert [f.title for f in await findings_tracker.get_history(limit=2)] == titles
+
+
+@pytest.mark.asyncio
+async def test_legacy_ids_rekeyed_on_load(tmp_path):
+    import hashlib
+
+    tracker = FindingsTracker(tmp_path)
+    await tracker.initialize()
+    legacy_id = hashlib.sha256(b"r1:chassis:PSU failed").hexdigest()[:16]
+    await tracker._db.execute(
+        "INSERT INTO findings VALUES (?, 'r1', 'critical', 'chassis', "
+        "'PSU failed', '', '', 't0', 't0', 0, NULL)", (legacy_id,),
+    )
+    await tracker._db.commit()
+    await tracker.close()
+
+    tracker = FindingsTracker(tmp_path)
+    await tracker.initialize()
+    try:
+        finding, is_new = await tracker.add_or_update(
+            device="r1", severity=Severity.CRITICAL, category="chassis",
+            title="PSU failed", detail="", recommendation="",
+        )
+        assert is_new is False
+        assert finding.first_seen == "t0"
+        assert len(await tracker.get_history()) == 1
+    finally:
+        await tracker.close()
+
+
+@pytest.mark.asyncio
+async def test_raw_data_stored_as_blob_and_legacy_text_loads(
+    findings_tracker: FindingsTracker,
+):
+    await findings_tracker.add_or_update(
+        device="r1", severity=Severity.INFO, category="chassis",
+        title="Fan 0", detail="", recommendation="", raw_data={"rpm": 9000},
+    )
+    await findings_tracker._db.execute(
+        "INSERT INTO findings VALUES ('legacy', 'r1', 'info', 'chassis', "
+        "'Fan 1', '', '', 't0', 't0', 1, '{\"rpm\": 100}')",
+    )
+    async with findings_tracker._db.execute(
+        "SELECT typeof(raw_data) FROM findings WHERE id != 'legacy'",
+    ) as cursor:
+        assert await cursor.fetchone() == ("blob",)
+
+    history = await findings_tracker.get_history(device="r1")
+    assert {f.title: f.raw_data for f in history} == {
+        "Fan 0": {"rpm": 9000}, "Fan 1": {"rpm": 100},
+    }
+
+
+@pytest.mark.asyncio
+async def test_loaded_findings_share_device_and_category_strings(
+    findings_tracker: FindingsTracker,
+):
+    for title in ("Fan 0", "Fan 1"):
+        await findings_tracker.add_or_update(
+            device="r1", severity=Severity.INFO, category="chassis",
+            title=title, detail="", recommendation="",
+        )
+    first, second = await findings_tracker.get_history()
+    assert first.device is second.device
+    assert first.category is second.category
+
+
+@pytest.mark.asyncio
+async def test_initialize_loads_and_indexes_active_findings(tmp_path):
+    tracker = FindingsTracker(tmp_path)
+    await tracker.initialize()
+    for title, severity in (("PSU failed", Severity.CRITICAL),
+                            ("Fan 0", Severity.WARNING)):
+        await tracker.add_or_update(
+            device="r1", severity=severity, category="chassis",
+            title=title, detail="", recommendation="",
+        )
+    await tracker.resolve_missing("r1", "chassis", {"PSU failed"})
+    await tracker.close()
+
+    tracker = FindingsTracker(tmp_path)
+    await tracker.initialize()
+    try:
+        assert [f.title for f in tracker.get_active(device="r1")] == [
+            "PSU failed",
+        ]
+        assert tracker.critical_count == 1
+    finally:
+        await tracker.close()
@@ -99,6 +99,45 @@ def test_get_instructions_auto_reloads(hb_file: Path, hb_manager: HeartbeatManag
     assert "updated" in content
 
 
+def test_get_instructions_skips_read_when_unchanged(
+    hb_file: Path, hb_manager: HeartbeatManager,
+):
+    hb_file.write_text("")
+    assert hb_manager.get_instructions() == ""
+
+    with patch.object(Path, "read_text") as read_text:
+        assert hb_manager.get_instructions() == ""
+    read_text.assert_not_called()
+
+
+def test_parsed_lines_cached_until_content_changes(
+    hb_file: Path, hb_manager: HeartbeatManager,
+):
+    hb_file.write_text("# Header\n- Alpha\n")
+    lines = hb_manager._get_lines()
+    assert lines == ["- Alpha"]
+    assert hb_manager._get_lines() is lines
+
+    hb_manager.add_instruction("Beta")
+    assert hb_manager._get_lines() == ["- Alpha", "- Beta"]
+
+
+def test_mutators_check_disk_once(hb_file: Path, hb_manager: HeartbeatManager):
+    hb_file.write_text("- Alpha\n- Beta\n")
+    hb_manager.load()
+
+    with patch.object(
+        HeartbeatManager, "has_changed", autospec=True, return_value=False,
+    ) as has_changed:
+        assert hb_manager.add_instruction("Gamma") == (
+            "1. Alpha\n2. Beta\n3. Gamma"
+        )
+        assert has_changed.call_count == 1
+        assert hb_manager.remove_instruction(1) == "1. Beta\n2. Gamma"
+        assert has_changed.call_count == 2
+    assert hb_file.read_text() == "- Beta\n- Gamma\n"
+
+
 def test_add_instruction(hb_file: Path, hb_manager: HeartbeatManager):
     hb_file.write_text("# Heartbeat\n- Existing check\n")
     hb_manager.load()
@@ -215,8 +254,8 @@ async def test_run_heartbeat_with_findings(tmp_path: Path):
     ))
 
     findings_tracker = AsyncMock(spec=FindingsTracker)
-    findings_tracker.add_or_update = AsyncMock(
-        return_value=(MagicMock(), True),
+    findings_tracker.add_or_update_many = AsyncMock(
+        return_value=[(MagicMock(), True)],
     )
     findings_tracker.resolve_missing = AsyncMock(return_value=[])
 
@@ -228,10 +267,10 @@ async def test_run_heartbeat_with_findings(tmp_path: Path):
     await agent._run_heartbeat()
 
     llm.chat.assert_called()
-    findings_tracker.add_or_update.assert_called_once()
-    call_kwargs = findings_tracker.add_or_update.call_args
-    assert call_kwargs.kwargs["category"] == "heartbeat"
-    assert call_kwargs.kwargs["device"] == "*"
+    findings_tracker.add_or_update_many.assert_called_once()
+    [record] = findings_tracker.add_or_update_many.call_args.args[0]
+    assert record["category"] == "heartbeat"
+    assert record["device"] == "*"
 
 
 @pytest.mark.asyncio
@@ -247,7 +286,7 @@ async def test_run_heartbeat_silent_when_ok(tmp_path: Path):
     ))
 
     findings_tracker = AsyncMock(spec=FindingsTracker)
-    findings_tracker.add_or_update = AsyncMock()
+    findings_tracker.add_or_update_many = AsyncMock()
     findings_tracker.resolve_missing = AsyncMock(return_value=[])
 
     agent = _make_agent(
@@ -258,7 +297,7 @@ async def test_run_heartbeat_silent_when_ok(tmp_path: Path):
     await agent._run_heartbeat()
 
     llm.chat.assert_called()
-    findings_tracker.add_or_update.assert_not_called()
+    findings_tracker.add_or_update_many.assert_not_called()
 
 
 @pytest.mark.asyncio
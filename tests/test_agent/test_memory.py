@@ -102,6 +102,12 @@ class TestCategorizedDeviceMemory:
         content = store.get_device("production/mx-01")
         assert "New data" in content
 
+    def test_device_path_and_heading_computed_once(self, store: MemoryStore) -> None:
+        path = store._device_path("production/mx-01")
+        assert store._device_path("production/mx-01") is path
+        assert store._device_heading("production/mx-01") == "# Device: mx-01"
+        assert store._device_heading("r1") == "# Device: r1"
+
     def test_migrate_skips_bare_keys(self, store: MemoryStore) -> None:
         """Bare keys (uncategorized) should not be migrated."""
         migrated = store.migrate_device_files(["r1"])
@@ -146,6 +152,25 @@ class TestIncidentMemory:
         assert len(store.list_incidents(limit=3)) == 3
 
 
+    def test_list_incidents_newest_first_md_only(self, store: MemoryStore) -> None:
+        import os
+
+        incidents = store._base / "incidents"
+        for age, slug in enumerate(["new", "mid", "old"]):
+            path = incidents / f"{slug}.md"
+            path.write_text("x")
+            os.utime(path, (1000 - age, 1000 - age))
+        (incidents / "notes.txt").write_text("x")
+        (incidents / "dir.md").mkdir()
+        assert store.list_incidents(limit=2) == ["new", "mid"]
+
+    def test_device_names_ignore_non_md(self, store: MemoryStore) -> None:
+        devices = store._base / "devices"
+        store.save_device("lab/r1", "note")
+        (devices / "README.txt").write_text("x")
+        (devices / "lab" / "notes.txt").write_text("x")
+        assert store.get_all_device_names() == ["lab/r1"]
+
 class TestTruncation:
     def test_truncates_large_file(self, store: MemoryStore) -> None:
         """When content exceeds max_file_size, it should be truncated."""
@@ -154,6 +179,16 @@ class TestTruncation:
         content = store.get_device("big")
         assert len(content) <= store._max_file_size + 50  # allow small buffer
 
+    def test_truncation_keeps_whole_recent_lines(self, store: MemoryStore) -> None:
+        lines = [f"entry {i:04d}" for i in range(1000)]
+        store.save_device("big", "\n".join(lines))
+        content = store.get_device("big")
+        header, body = content.split("(earlier entries truncated)\n\n")
+        assert header == "# Device: big\n\n"
+        kept = body.rstrip("\n").split("\n")
+        assert kept == lines[-len(kept):]
+        assert kept[-1] == "entry 0999"
+
 
 class TestBuildMemoryContext:
     def test_empty_when_no_memory(self, store: MemoryStore) -> None:
@@ -189,6 +224,42 @@ class TestBuildMemoryContext:
         assert ctx.index("USER_PREF") < ctx.index("DEVICE_PROF")
         assert ctx.index("DEVICE_PROF") < ctx.index("INCIDENT_REC")
 
+    def test_unchanged_files_reuse_assembled_context(
+        self, store: MemoryStore,
+    ) -> None:
+        from unittest.mock import patch
+
+        store.save_user_preferences("terse")
+        store.save_device("r1", "quirk")
+        first = store.build_memory_context()
+        with patch.object(store, "_read_cached") as read:
+            assert store.build_memory_context() is first
+        read.assert_not_called()
+
+    def test_context_rebuilt_after_external_edit(self, store: MemoryStore) -> None:
+        import os
+
+        store.save_device("r1", "quirk")
+        assert "quirk" in store.build_memory_context()
+        path = store._device_path("r1")
+        path.write_text("# Device: r1\n\nedited\n", encoding="utf-8")
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert "edited" in store.build_memory_context()
+
+    def test_budget_exhaustion_drops_later_files(self, tmp_path: Path) -> None:
+        store = MemoryStore(tmp_path, max_file_size=200, max_total_size=150)
+        store.initialize()
+        store.save_user_preferences("U" * 100)
+        store.save_device("r2", "B" * 50)
+        store.save_device("r1", "A" * 50)
+        store.save_incident("inc-1", "INCIDENT_REC")
+        ctx = store.build_memory_context(device_names=["r2", "r1"])
+        assert "U" * 100 in ctx
+        assert "# Device: r2" in ctx
+        assert "# Device: r1" not in ctx
+        assert "INCIDENT_REC" not in ctx
+
 
 class TestMtimeCaching:
     def test_detects_external_edit(self, store: MemoryStore) -> None:
@@ -204,6 +275,48 @@ class TestMtimeCaching:
         assert "Edited externally" in content2
 
 
+    def test_cache_hit_does_not_reopen(self, store: MemoryStore) -> None:
+        from unittest.mock import patch
+
+        store.save_device("r1", "Original")
+        store.get_device("r1")
+        with patch("builtins.open") as opened:
+            assert "Original" in store.get_device("r1")
+        opened.assert_not_called()
+
+    def test_deleted_file_reads_empty(self, store: MemoryStore) -> None:
+        store.save_device("r1", "Original")
+        store._device_path("r1").unlink()
+        assert store.get_device("r1") == ""
+
+    def test_save_caches_written_content(self, store: MemoryStore) -> None:
+        from unittest.mock import patch
+
+        store.save_device("r1", "Original")
+        with patch("builtins.open") as opened:
+            assert store.get_device("r1") == "# Device: r1\n\nOriginal\n"
+        opened.assert_not_called()
+
+    def test_append_writes_only_new_entry(self, store: MemoryStore) -> None:
+        from unittest.mock import patch
+
+        store.save_device("r1", "First")
+        with patch.object(Path, "write_text") as write_text:
+            store.save_device("r1", "Second")
+        write_text.assert_not_called()
+        expected = "# Device: r1\n\nFirst\n\nSecond\n"
+        assert store._device_path("r1").read_text() == expected
+        assert store.get_device("r1") == expected
+
+    def test_append_after_external_edit_collapses_blank_lines(
+        self, store: MemoryStore,
+    ) -> None:
+        store.save_device("r1", "First")
+        path = store._device_path("r1")
+        path.write_text("# Device: r1\n\nEdited\n\n\n\n", encoding="utf-8")
+        store.save_device("r1", "Second")
+        assert path.read_text() == "# Device: r1\n\nEdited\n\nSecond\n"
+
 class TestGenericInterface:
     def test_save_and_read_device(self, store: MemoryStore) -> None:
         result = store.save("device", "r1", "Quirk noted")
@@ -244,3 +357,27 @@ class TestMemoryConfig:
         cfg = MemoryConfig(enabled=False, max_file_size=4000, max_total_size=12000)
         assert cfg.enabled is False
         assert cfg.max_file_size == 4000
+
+
+class TestSanitize:
+    def test_replaces_unsafe_characters(self) -> None:
+        assert MemoryStore._sanitize("core/r1 lab:1") == "core_r1_lab_1"
+        assert MemoryStore._sanitize("edge-1.lab") == "edge-1.lab"
+
+    def test_memoized(self) -> None:
+        MemoryStore._sanitize("spine 1")
+        hits = MemoryStore._sanitize.cache_info().hits
+        MemoryStore._sanitize("spine 1")
+        assert MemoryStore._sanitize.cache_info().hits == hits + 1
+
+
+class TestMemoryContextFormat:
+    def test_exact_layout(self, store: MemoryStore) -> None:
+        store.save_user_preferences("terse")
+        store.save_device("r1", "quirk")
+        assert store.build_memory_context() == (
+            "\n\n--- Persistent Memory ---\n\n"
+            "# User Preferences\n\nterse\n\n\n"
+            "# Device: r1\n\nquirk\n\n\n"
+            "--- End Memory ---"
+        )
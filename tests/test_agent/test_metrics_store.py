@@ -2,6 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import statistics
+
 import pytest
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -148,3 +152,385 @@ async def test_to_dict(store: MetricsStore):
     assert d["metric"] == "route_total"
     assert d["value"] == 1500.0
     assert d["tags"] == {"table": "inet.0"}
+
+
+@pytest.mark.asyncio
+async def test_stats_matches_population_stddev(store: MetricsStore):
+    values = [10.0, 12.0, 14.0, 16.0]
+    await store.record_many([
+        MetricPoint(device="mx-01", category="chassis", metric="re_cpu_pct",
+                     value=v) for v in values
+    ])
+
+    count, mean, stddev = await store.stats("mx-01", "re_cpu_pct", since_hours=1)
+    assert count == 4
+    assert mean == pytest.approx(13.0)
+    assert stddev == pytest.approx(5.0 ** 0.5)
+
+
+@pytest.mark.asyncio
+async def test_stats_empty_window(store: MetricsStore):
+    assert await store.stats("mx-01", "nonexistent") == (0, 0.0, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_stats_updates_incrementally(store: MetricsStore):
+    await store.record_many([
+        MetricPoint(device="mx-01", category="chassis", metric="re_cpu_pct",
+                     value=v) for v in (10.0, 12.0)
+    ])
+    assert await store.stats("mx-01", "re_cpu_pct") == (2, 11.0, 1.0)
+
+    await store.record(MetricPoint(
+        device="mx-01", category="chassis", metric="re_cpu_pct", value=20.0,
+    ))
+    count, mean, stddev = await store.stats("mx-01", "re_cpu_pct")
+    assert count == 3
+    assert mean == pytest.approx(14.0)
+    assert stddev == pytest.approx(statistics.pstdev([10.0, 12.0, 20.0]))
+
+
+@pytest.mark.asyncio
+async def test_stats_limit_keeps_most_recent(store: MetricsStore):
+    values = [float(v) for v in range(1, 21)]
+    for v in values:
+        await store.record(MetricPoint(
+            device="mx-01", category="chassis", metric="re_cpu_pct", value=v,
+        ))
+        await store.stats("mx-01", "re_cpu_pct", limit=5)
+
+    count, mean, stddev = await store.stats("mx-01", "re_cpu_pct", limit=5)
+    assert count == 5
+    assert mean == pytest.approx(statistics.fmean(values[-5:]))
+    assert stddev == pytest.approx(statistics.pstdev(values[-5:]))
+    # Evicted values are compacted out of the backing array
+    assert len(store._windows[("mx-01", "re_cpu_pct")].values) <= 10
+
+
+@pytest.mark.asyncio
+async def test_version_bumps_on_write(store: MetricsStore):
+    assert store.version("mx-01", "re_cpu_pct") == 0
+    await store.record(MetricPoint(
+        device="mx-01", category="chassis", metric="re_cpu_pct", value=1.0,
+    ))
+    first = store.version("mx-01", "re_cpu_pct")
+    await store.stats("mx-01", "re_cpu_pct")
+    assert store.version("mx-01", "re_cpu_pct") == first
+
+    await store.record(MetricPoint(
+        device="mx-01", category="chassis", metric="re_cpu_pct", value=2.0,
+    ))
+    assert store.version("mx-01", "re_cpu_pct") > first
+    assert store.version("mx-01", "other") == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_many_matches_stats(store: MetricsStore):
+    await store.record_many([
+        MetricPoint(device="mx-01", category="chassis", metric=m, value=v)
+        for m, v in (("a", 1.0), ("b", 10.0), ("a", 3.0), ("b", 30.0))
+    ])
+
+    result = await store.stats_many("mx-01", ["a", "b", "missing"])
+    assert result["a"] == (2, 2.0, 1.0)
+    assert result["b"] == (2, 20.0, 10.0)
+    assert result["missing"] == (0, 0.0, 0.0)
+    assert await store.stats("mx-01", "a") == result["a"]
+
+
+@pytest.mark.asyncio
+async def test_latest_many(store: MetricsStore):
+    now = datetime.now()
+    await store.record_many([
+        MetricPoint(device="mx-01", category="interfaces", metric=m, value=v,
+                    ts=(now - timedelta(minutes=age)).isoformat())
+        for m, v, age in (("in_errors", 5.0, 10), ("in_errors", 7.0, 1),
+                          ("out_errors", 3.0, 5), ("in_errors", 6.0, 4))
+    ])
+    await store.record(MetricPoint(
+        device="mx-02", category="interfaces", metric="in_errors", value=99.0,
+    ))
+
+    latest = await store.latest_many("mx-01", ["in_errors", "out_errors", "missing"])
+    assert {m: p.value for m, p in latest.items()} == {
+        "in_errors": 7.0, "out_errors": 3.0,
+    }
+    assert latest["in_errors"].category == "interfaces"
+
+
+async def _row_count(store: MetricsStore) -> int:
+    async with store._db.execute("SELECT COUNT(*) FROM metrics") as cursor:
+        (count,) = await cursor.fetchone()
+    return count
+
+
+@pytest.mark.asyncio
+async def test_record_is_buffered_until_flush(store: MetricsStore):
+    await store.record(MetricPoint(
+        device="r1", category="system", metric="cpu", value=1.0,
+    ))
+    assert await _row_count(store) == 0
+    assert (await store.stats("r1", "cpu"))[0] == 1  # read flushes
+    assert await _row_count(store) == 1
+
+
+@pytest.mark.asyncio
+async def test_record_flushes_on_timer_and_threshold(store: MetricsStore, monkeypatch):
+    import asyncio
+
+    import jace.agent.metrics_store as metrics_store
+
+    monkeypatch.setattr(metrics_store, "RECORD_FLUSH_INTERVAL", 0.01)
+    monkeypatch.setattr(metrics_store, "RECORD_FLUSH_ROWS", 3)
+    await store.record(MetricPoint(
+        device="r1", category="system", metric="cpu", value=1.0,
+    ))
+    await asyncio.sleep(0.05)
+    assert await _row_count(store) == 1
+
+    for i in range(3):
+        await store.record(MetricPoint(
+            device="r1", category="system", metric="cpu", value=float(i),
+        ))
+    assert await _row_count(store) == 4
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_buffered_points(tmp_path: Path):
+    s = MetricsStore(tmp_path)
+    await s.initialize()
+    await s.record(MetricPoint(
+        device="r1", category="system", metric="cpu", value=1.0,
+    ))
+    await s.close()
+
+    s = MetricsStore(tmp_path)
+    await s.initialize()
+    try:
+        assert len(await s.query("r1", "cpu")) == 1
+    finally:
+        await s.close()
+
+
+@pytest.mark.asyncio
+async def test_database_uses_wal_journal(store: MetricsStore):
+    async with store._db.execute("PRAGMA journal_mode") as cursor:
+        assert await cursor.fetchone() == ("wal",)
+    async with store._db.execute("PRAGMA synchronous") as cursor:
+        assert await cursor.fetchone() == (1,)  # NORMAL
+
+
+@pytest.mark.asyncio
+async def test_ts_stored_as_integer_and_round_trips(store: MetricsStore):
+    ts = datetime.now().replace(microsecond=123456).isoformat()
+    await store.record_many([MetricPoint(
+        device="r1", category="system", metric="cpu", value=1.0, ts=ts,
+    )])
+    async with store._db.execute("SELECT typeof(ts) FROM metrics") as cursor:
+        assert await cursor.fetchone() == ("integer",)
+    (point,) = await store.query("r1", "cpu")
+    assert point.ts == ts
+
+
+@pytest.mark.asyncio
+async def test_text_timestamps_migrated_on_initialize(tmp_path: Path):
+    import aiosqlite
+
+    ts = (datetime.now() - timedelta(hours=1)).isoformat()
+    async with aiosqlite.connect(str(tmp_path / "metrics.db")) as db:
+        await db.execute("""
+            CREATE TABLE metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                device TEXT NOT NULL, category TEXT NOT NULL,
+                metric TEXT NOT NULL, value REAL NOT NULL,
+                unit TEXT NOT NULL DEFAULT '', ts TEXT NOT NULL,
+                tags TEXT NOT NULL DEFAULT '{}'
+            )
+        """)
+        await db.execute(
+            "INSERT INTO metrics (device, category, metric, value, ts) "
+            "VALUES ('r1', 'system', 'cpu', 42.0, ?)", (ts,),
+        )
+        await db.commit()
+
+    s = MetricsStore(tmp_path)
+    await s.initialize()
+    try:
+        (point,) = await s.query("r1", "cpu")
+        assert (point.value, point.ts) == (42.0, ts)
+        async with s._db.execute("PRAGMA table_info(metrics)") as cursor:
+            types = {row[1]: row[2] async for row in cursor}
+        assert types["ts"] == "INTEGER"
+    finally:
+        await s.close()
+
+
+@pytest.mark.asyncio
+async def test_record_many_encodes_shared_tags_once(store: MetricsStore):
+    from unittest.mock import patch
+
+    tags = {"slot": "0"}
+    points = [
+        MetricPoint(device="r1", category="chassis", metric=m, value=1.0,
+                    tags=tags)
+        for m in ("temp", "temp_delta")
+    ] + [MetricPoint(device="r1", category="chassis", metric="fan", value=2.0)]
+    with patch("jace.agent.metrics_store.json.dumps",
+               wraps=json.dumps) as dumps:
+        await store.record_many(points)
+    assert dumps.call_count == 1
+    assert (await store.latest("r1", "temp_delta")).tags == tags
+    assert (await store.latest("r1", "fan")).tags == {}
+
+
+@pytest.mark.asyncio
+async def test_point_reads_use_covering_index(store: MetricsStore):
+    from jace.agent.metrics_store import _LATEST_SQL, _QUERY_SQL
+
+    for sql, params in ((_QUERY_SQL, ("r1", "cpu", 0, 10)),
+                        (_LATEST_SQL, ("r1", "cpu"))):
+        async with store._db.execute(
+            "EXPLAIN QUERY PLAN " + sql, params,
+        ) as cursor:
+            plan = " ".join([row[-1] async for row in cursor])
+        assert "COVERING INDEX idx_metrics_cover" in plan
+    async with store._db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' "
+        "AND tbl_name = 'metrics'",
+    ) as cursor:
+        names = {row[0] async for row in cursor}
+    assert "idx_metrics_device_metric_ts" not in names
+
+
+@pytest.mark.asyncio
+async def test_undated_points_share_stamp_within_a_millisecond(
+    store: MetricsStore, monkeypatch,
+):
+    from jace.agent import metrics_store
+
+    clock = iter([10**18, 10**18 + 500_000, 10**18 + 2_000_000])
+    monkeypatch.setattr(metrics_store.time, "time_ns", lambda: next(clock))
+    points = [MetricPoint(device="r1", category="system", metric="cpu",
+                          value=float(i)) for i in range(3)]
+    for p in points:
+        await store.record(p)
+    assert points[0].ts == points[1].ts != points[2].ts
+    assert points[0].ts == metrics_store._ns_to_iso(10**18)
+
+
+@pytest.mark.asyncio
+async def test_record_many_skips_clock_when_all_points_dated(
+    store: MetricsStore, monkeypatch,
+):
+    from jace.agent import metrics_store
+
+    ts = datetime.now().isoformat()
+    monkeypatch.setattr(metrics_store, "_ns_to_iso", None)  # must not be called
+    await store.record_many([MetricPoint(
+        device="r1", category="system", metric="cpu", value=1.0, ts=ts,
+    )])
+    async with store._db.execute("SELECT COUNT(*) FROM metrics") as cursor:
+        assert await cursor.fetchone() == (1,)
+
+
+@pytest.mark.asyncio
+async def test_stamp_not_reused_after_clock_steps_back(
+    store: MetricsStore, monkeypatch,
+):
+    from jace.agent import metrics_store
+
+    clock = iter([10**18, 10**18 - 5 * 10**9, 10**18 - 5 * 10**9 + 100])
+    monkeypatch.setattr(metrics_store.time, "time_ns", lambda: next(clock))
+    points = [MetricPoint(device="r1", category="system", metric="cpu",
+                          value=float(i)) for i in range(3)]
+    for p in points:
+        await store.record(p)
+    assert points[1].ts == metrics_store._ns_to_iso(10**18 - 5 * 10**9)
+    assert points[2].ts == points[1].ts != points[0].ts
+
+
+def _race_seed(store: MetricsStore, write) -> None:
+    """Run *write* once, inside the first window-seeding scan."""
+    seed = store._seed
+
+    async def racing_seed(windows, since):
+        store._seed = seed
+        await write()
+        await seed(windows, since)
+
+    store._seed = racing_seed
+
+
+@pytest.mark.asyncio
+async def test_record_many_during_seeding_is_counted_once(store: MetricsStore):
+    await store.record_many([MetricPoint(
+        device="r1", category="system", metric="cpu", value=v,
+    ) for v in (1.0, 2.0, 3.0)])
+    _race_seed(store, lambda: store.record_many([MetricPoint(
+        device="r1", category="system", metric="cpu", value=10.0,
+    )]))
+    assert (await store.stats("r1", "cpu"))[:2] == (4, 4.0)
+    assert (await store.stats("r1", "cpu"))[:2] == (4, 4.0)
+
+
+@pytest.mark.asyncio
+async def test_record_during_seeding_reaches_window(store: MetricsStore):
+    await store.record_many([MetricPoint(
+        device="r1", category="system", metric="cpu", value=v,
+    ) for v in (1.0, 2.0, 3.0)])
+    _race_seed(store, lambda: store.record(MetricPoint(
+        device="r1", category="system", metric="cpu", value=10.0,
+    )))
+    assert (await store.stats("r1", "cpu"))[:2] == (4, 4.0)
+    await store.record(MetricPoint(
+        device="r1", category="system", metric="cpu", value=4.0,
+    ))
+    assert (await store.stats("r1", "cpu"))[:2] == (5, 4.0)
+
+
+def _slow_writes(store: MetricsStore) -> asyncio.Event:
+    """Delay the store's batch inserts; the event is set once one starts."""
+    executemany = store._db.executemany
+    writing = asyncio.Event()
+
+    async def slow_executemany(sql, rows):
+        writing.set()
+        await asyncio.sleep(0.05)
+        return await executemany(sql, rows)
+
+    store._db.executemany = slow_executemany
+    return writing
+
+
+@pytest.mark.asyncio
+async def test_close_during_timed_flush_writes_rows_once(
+    tmp_path: Path, monkeypatch,
+):
+    from jace.agent import metrics_store
+
+    monkeypatch.setattr(metrics_store, "RECORD_FLUSH_INTERVAL", 0)
+    s = MetricsStore(tmp_path)
+    await s.initialize()
+    writing = _slow_writes(s)
+    await s.record(MetricPoint(
+        device="r1", category="system", metric="cpu", value=1.0,
+    ))
+    await writing.wait()  # the timer's flush is now mid-write
+    await s.close()
+
+    # A flush whose caller is cancelled mid-write still writes exactly once
+    monkeypatch.setattr(metrics_store, "RECORD_FLUSH_INTERVAL", 60)
+    s = MetricsStore(tmp_path)
+    await s.initialize()
+    try:
+        writing = _slow_writes(s)
+        await s.record(MetricPoint(
+            device="r1", category="system", metric="cpu", value=2.0,
+        ))
+        flush = asyncio.create_task(s.flush())
+        await writing.wait()
+        flush.cancel()
+        await s.flush()
+        assert [p.value for p in await s.query("r1", "cpu")] == [1.0, 2.0]
+    finally:
+        await s.close()
@@ -238,3 +238,27 @@ async def test_profile_tool_without_memory_store():
     result = await agent._execute_tool(tool_call)
 
     assert "not configured" in result.lower()
+
+
+@pytest.mark.asyncio
+async def test_profile_all_continues_after_failure():
+    """One device failing should not stop the others from being profiled."""
+    dm = MagicMock(spec=DeviceManager)
+    dm.get_connected_devices = MagicMock(return_value=["r1", "r2"])
+    dm.run_command = AsyncMock(return_value=_cmd_result())
+
+    llm = AsyncMock()
+    llm.chat = AsyncMock(side_effect=[
+        RuntimeError("LLM down"),
+        Response(content="## Device Profile\n**Role:** core", stop_reason="end_turn"),
+    ])
+
+    memory = MagicMock(spec=MemoryStore)
+    memory.get_device = MagicMock(return_value="")
+    memory.save = MagicMock(return_value="Saved.")
+
+    agent = _make_agent(llm=llm, device_manager=dm, memory_store=memory)
+    await agent.profile_all_devices()  # Should not raise
+
+    assert llm.chat.call_count == 2
+    assert memory.save.call_count == 1
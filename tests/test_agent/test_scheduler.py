@@ -0,0 +1,35 @@
+"""Tests for the background check scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from jace.agent.scheduler import Scheduler
+from jace.config.settings import ScheduleConfig
+
+
+@pytest.mark.asyncio
+async def test_update_interval_wakes_sleeping_loop():
+    scheduler = Scheduler(ScheduleConfig())
+    scheduler._running = True
+    runs: list[float] = []
+    second_run = asyncio.Event()
+
+    async def callback(category: str, device_name: str) -> None:
+        runs.append(asyncio.get_running_loop().time())
+        if len(runs) == 2:
+            second_run.set()
+            scheduler._running = False
+
+    scheduler._default_intervals["chassis"] = 3600
+    task = asyncio.create_task(
+        scheduler._run_loop("chassis", "r1", interval=0, callback=callback),
+    )
+    await asyncio.sleep(0.05)
+    assert len(runs) == 1
+
+    scheduler.update_interval("chassis", 0)
+    await asyncio.wait_for(second_run.wait(), timeout=1)
+    await asyncio.wait_for(task, timeout=1)
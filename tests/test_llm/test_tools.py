@@ -1,5 +1,9 @@
 """Tests for LLM tool definitions."""
 
+import pytest
+
+from jace.llm.anthropic import AnthropicClient
+from jace.llm.openai_compat import OpenAICompatClient
 from jace.llm.tools import AGENT_TOOLS
 
 
@@ -23,3 +27,40 @@ def test_expected_tools_exist():
         "list_devices", "get_findings", "run_health_check", "compare_config",
     }
     assert expected <= names
+
+
+@pytest.mark.parametrize("client_cls", [AnthropicClient, OpenAICompatClient])
+def test_client_reuses_tool_payload_until_tools_change(client_cls):
+    client = client_cls(model="test", api_key="key")
+    first = client._cached_tools(AGENT_TOOLS)
+    assert client._cached_tools(list(AGENT_TOOLS)) is first
+    assert len(first) == len(AGENT_TOOLS)
+
+    fewer = client._cached_tools(AGENT_TOOLS[:2])
+    assert fewer is not first
+    assert len(fewer) == 2
+
+
+def test_anthropic_marks_tools_and_last_message_cacheable():
+    from jace.llm.base import Message, Role, ToolCall
+
+    client = AnthropicClient(model="test", api_key="key")
+    tools = client._cached_tools(AGENT_TOOLS)
+    assert tools[-1]["cache_control"] == {"type": "ephemeral"}
+    assert all("cache_control" not in t for t in tools[:-1])
+
+    messages = client._convert_messages([
+        Message(role=Role.USER, content="check r1"),
+        Message(role=Role.ASSISTANT, content="", tool_calls=[
+            ToolCall(id="t1", name="get_config", arguments={"device": "r1"}),
+        ]),
+        Message(role=Role.TOOL, content="config", tool_call_id="t1"),
+    ])
+    assert messages[0]["content"] == "check r1"
+    assert "cache_control" not in messages[1]["content"][-1]
+    assert messages[-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+
+    single = client._convert_messages([Message(role=Role.USER, content="hi")])
+    assert single == [{"role": "user", "content": [
+        {"type": "text", "text": "hi", "cache_control": {"type": "ephemeral"}},
+    ]}]